@@ -0,0 +1,231 @@
+"""
+Batch Extraction Module
+Submits many trips to the OpenAI Batch API for offline bulk processing
+(nightly reconciliation etc.): ~50% cheaper than live calls and outside the
+real-time rate limits, at the cost of up to 24h turnaround
+
+Usage (from aduana_backend/, one directory per trip holding doda.*,
+manifest.*, prefile.*, tractor.* and trailer.* images):
+    python -m core.batch_extractor trips/0001 trips/0002 ...
+"""
+
+import argparse
+import asyncio
+import glob
+import logging
+import os
+from typing import Dict, List
+
+import orjson
+
+from core.ocr_extractor import (
+    DOCUMENT_EXTRACTIONS,
+    build_extracted_model,
+    build_vision_request,
+    extract_json_from_response,
+    get_openai_client,
+    read_image_files
+)
+from models.schemas import AllExtractedData
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Batch API configuration
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_POLL_INTERVAL = 30  # seconds (first poll)
+BATCH_MAX_POLL_INTERVAL = 600  # seconds
+BATCH_FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def _custom_id(trip_index: int, field: str) -> str:
+    return f"trip_{trip_index}_{field}"
+
+
+def build_batch_requests(trips: List[Dict[str, bytes]]) -> bytes:
+    """
+    Encode every document of every trip as one Batch API JSONL line
+
+    Args:
+        trips: One dict per trip with optimized JPEG bytes keyed 'doda',
+               'manifest', 'prefile', 'tractor' and 'trailer'
+
+    Returns:
+        JSONL file contents
+    """
+    lines = []
+    for trip_index, images in enumerate(trips):
+        for field, (image_key, prompt, _, detail) in DOCUMENT_EXTRACTIONS.items():
+            lines.append(orjson.dumps({
+                "custom_id": _custom_id(trip_index, field),
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": build_vision_request(images[image_key], prompt, detail)
+            }))
+    return b"\n".join(lines) + b"\n"
+
+
+async def submit_batch(trips: List[Dict[str, bytes]]) -> str:
+    """
+    Upload the trips' requests and start a batch job
+
+    Args:
+        trips: Trips as accepted by build_batch_requests
+
+    Returns:
+        Batch job ID
+    """
+    client = get_openai_client()
+
+    input_file = await client.files.create(
+        file=("aduana_batch.jsonl", build_batch_requests(trips)),
+        purpose="batch"
+    )
+    batch = await client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window=BATCH_COMPLETION_WINDOW
+    )
+
+    logger.info("Submitted batch %s with %d trips", batch.id, len(trips))
+    return batch.id
+
+
+async def wait_for_batch(batch_id: str, poll_interval: float = BATCH_POLL_INTERVAL):
+    """
+    Poll a batch job until it reaches a final status, backing off between polls
+
+    Args:
+        batch_id: Batch job ID
+        poll_interval: Seconds before the first poll (doubles up to BATCH_MAX_POLL_INTERVAL)
+
+    Returns:
+        Final Batch object
+
+    Raises:
+        ValueError: If the batch did not complete
+    """
+    client = get_openai_client()
+
+    while True:
+        batch = await client.batches.retrieve(batch_id)
+        if batch.status in BATCH_FINAL_STATUSES:
+            break
+        logger.info("Batch %s is %s, checking again in %.0f seconds", batch_id, batch.status, poll_interval)
+        await asyncio.sleep(poll_interval)
+        poll_interval = min(poll_interval * 2, BATCH_MAX_POLL_INTERVAL)
+
+    if batch.status != "completed" or not batch.output_file_id:
+        raise ValueError(f"Batch {batch_id} finished with status '{batch.status}'")
+
+    return batch
+
+
+def parse_batch_output(output: bytes, trip_count: int) -> List[AllExtractedData]:
+    """
+    Demultiplex a Batch API output file back into trips
+
+    Args:
+        output: Output JSONL file contents (lines may come in any order)
+        trip_count: Number of trips submitted
+
+    Returns:
+        One AllExtractedData per trip, in submission order
+
+    Raises:
+        ValueError: If any document is missing or failed
+    """
+    results = {}
+    for line in output.splitlines():
+        if line.strip():
+            item = orjson.loads(line)
+            results[item["custom_id"]] = item
+
+    extracted = []
+    for trip_index in range(trip_count):
+        documents = {}
+        for field, (_, _, model_cls, _) in DOCUMENT_EXTRACTIONS.items():
+            custom_id = _custom_id(trip_index, field)
+            item = results.get(custom_id)
+            if item is None or item.get("error") or item["response"]["status_code"] != 200:
+                raise ValueError(f"Batch request '{custom_id}' failed: {item and (item.get('error') or item['response'])}")
+
+            response_text = item["response"]["body"]["choices"][0]["message"]["content"]
+            documents[field] = build_extracted_model(model_cls, extract_json_from_response(response_text))
+
+        extracted.append(AllExtractedData(**documents))
+
+    return extracted
+
+
+async def fetch_batch_results(batch, trip_count: int) -> List[AllExtractedData]:
+    """
+    Download a completed batch's output and demultiplex it back into trips
+
+    Args:
+        batch: Completed Batch object
+        trip_count: Number of trips submitted
+
+    Returns:
+        One AllExtractedData per trip, in submission order
+    """
+    client = get_openai_client()
+
+    output = await client.files.content(batch.output_file_id)
+    return parse_batch_output(output.content, trip_count)
+
+
+async def extract_all_documents_batch(trips: List[Dict[str, bytes]]) -> List[AllExtractedData]:
+    """
+    Extract data for many trips through the Batch API (not for real-time use)
+
+    Args:
+        trips: One dict per trip with optimized JPEG bytes keyed 'doda',
+               'manifest', 'prefile', 'tractor' and 'trailer'
+
+    Returns:
+        One AllExtractedData per trip, in the same order as trips
+    """
+    batch_id = await submit_batch(trips)
+    batch = await wait_for_batch(batch_id)
+    return await fetch_batch_results(batch, len(trips))
+
+
+# Image file name (without extension) of each document inside a trip directory
+TRIP_IMAGE_NAMES = ("doda", "manifest", "prefile", "tractor", "trailer")
+
+
+async def read_trip_directory(directory: str) -> Dict[str, bytes]:
+    """
+    Read (and downscale) the 5 images of one trip directory
+
+    Args:
+        directory: Directory holding doda.*, manifest.*, prefile.*, tractor.* and trailer.*
+
+    Returns:
+        Dict of image bytes keyed as build_batch_requests expects
+
+    Raises:
+        ValueError: If an image is missing
+    """
+    paths = {}
+    for name in TRIP_IMAGE_NAMES:
+        matches = sorted(glob.glob(os.path.join(directory, f"{name}.*")))
+        if not matches:
+            raise ValueError(f"Missing '{name}' image in {directory}")
+        paths[name] = matches[0]
+    return await read_image_files(paths)
+
+
+async def _main(directories: List[str]) -> None:
+    trips = await asyncio.gather(*(read_trip_directory(directory) for directory in directories))
+    for directory, extracted in zip(directories, await extract_all_documents_batch(list(trips))):
+        print(orjson.dumps({"trip": directory, "extracted": extracted.model_dump()}).decode())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract many trips through the OpenAI Batch API (up to 24h)")
+    parser.add_argument("directories", nargs="+", help="Trip directories (doda.*, manifest.*, prefile.*, tractor.*, trailer.*)")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(parser.parse_args().directories))
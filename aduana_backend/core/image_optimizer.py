@@ -3,11 +3,15 @@ Image optimization module
 Handles decoding, resizing, and compression of base64 images
 """
 
-import base64
+import asyncio
+import binascii
 import io
+import os
 import re
-from typing import Tuple, Optional
-from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Tuple, Optional, Union
+import pybase64
+from PIL import Image, features
 import logging
 
 # Configure logging
@@ -18,69 +22,192 @@ logger = logging.getLogger(__name__)
 # Balanced resolution: 768px provides good quality for OCR while keeping costs reasonable
 MAX_WIDTH = 768
 MAX_HEIGHT = 768
+# Plate photos sent with detail="low" are seen by the model as one 512x512
+# image, so pixels beyond that only cost encode/upload time
+LOW_DETAIL_MAX_SIDE = 512
 # Quality 85 provides sharp text edges with minimal compression artifacts
 JPEG_QUALITY = 85
 PNG_OPTIMIZE = True
+# JPEGs already within MAX_WIDTH x MAX_HEIGHT and under this size are passed
+# through as-is instead of being decoded and re-encoded
+PASSTHROUGH_MAX_BYTES = 256 * 1024
 
+# Data URL pattern, compiled once: data:image/png;base64,ACTUAL_BASE64_DATA
+_DATA_URL_RE = re.compile(r'data:image/(?P<format>\w+);base64,(?P<data>.+)', re.DOTALL)
+# Base64 characters peeked by get_image_info (~1 KB decoded, enough for a PNG
+# IHDR or the SOF marker of a typical JPEG); must be a multiple of 4
+HEADER_PEEK_CHARS = 1400
 
-def decode_base64_image(base64_string: str) -> Image.Image:
+# Worker processes for optimize_images_batch, created on first use
+_PROCESS_POOL: Optional[ProcessPoolExecutor] = None
+
+# JPEG decode/encode dominates optimization time; libjpeg-turbo's SIMD codec
+# is ~2x faster than plain libjpeg (official Pillow wheels bundle it)
+if not features.check_feature('libjpeg_turbo'):
+    logger.warning("Pillow is not linked against libjpeg-turbo; JPEG encode/decode will be slower")
+
+
+def _decode_data_url(base64_string: str) -> Tuple[str, bytearray]:
     """
-    Decode a base64 data URL string into a PIL Image object
+    Split a base64 data URL and decode its payload
 
     Args:
         base64_string: Base64 data URL (e.g., "data:image/png;base64,iVBORw0KG...")
 
     Returns:
-        PIL Image object
+        Tuple of (image_format, image_bytes)
 
     Raises:
-        ValueError: If the base64 string is invalid or cannot be decoded
+        ValueError: If the data URL or its base64 payload is invalid
     """
+    # Validate format
+    if not base64_string.startswith('data:image/'):
+        raise ValueError("Invalid data URL format. Must start with 'data:image/'")
+
+    # Extract the base64 data (remove the data URL prefix)
+    # Format: data:image/png;base64,ACTUAL_BASE64_DATA
+    match = _DATA_URL_RE.match(base64_string)
+
+    if not match:
+        raise ValueError("Invalid base64 data URL format")
+
     try:
-        # Validate format
-        if not base64_string.startswith('data:image/'):
-            raise ValueError("Invalid data URL format. Must start with 'data:image/'")
+        # Decode straight into a mutable buffer (no intermediate bytes object);
+        # BytesIO/Pillow read it through the buffer protocol
+        return match.group('format'), pybase64.b64decode_as_bytearray(match.group('data'), validate=True)
+    except binascii.Error as e:
+        logger.error("Base64 decoding error: %s", e)
+        raise ValueError(f"Invalid base64 encoding: {e}")
+
+
+def _flatten_to_rgb(image: Image.Image) -> Image.Image:
+    """
+    Convert an image to RGB, compositing transparent modes over white
+
+    Args:
+        image: PIL Image object
+
+    Returns:
+        RGB PIL Image object (the same object if it was already RGB)
+    """
+    # Convert to RGB if necessary (some formats like RGBA need conversion for JPEG)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # Create a white background
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        if image.mode != 'RGBA':
+            image = image.convert('RGBA')
+        # getchannel() extracts only the alpha band; split() would copy all four
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+
+    if image.mode != 'RGB':
+        return image.convert('RGB')
+
+    return image
+
 
-        # Extract the base64 data (remove the data URL prefix)
-        # Format: data:image/png;base64,ACTUAL_BASE64_DATA
-        match = re.match(r'data:image/(?P<format>\w+);base64,(?P<data>.+)', base64_string)
+def decode_base64_image(base64_string: str) -> Image.Image:
+    """
+    Decode a base64 data URL string into a PIL Image object
 
-        if not match:
-            raise ValueError("Invalid base64 data URL format")
+    Args:
+        base64_string: Base64 data URL (e.g., "data:image/png;base64,iVBORw0KG...")
 
-        image_format = match.group('format')
-        base64_data = match.group('data')
+    Returns:
+        PIL Image object
 
-        # Decode base64 to bytes
-        image_bytes = base64.b64decode(base64_data)
+    Raises:
+        ValueError: If the base64 string is invalid or cannot be decoded
+    """
+    try:
+        image_format, image_bytes = _decode_data_url(base64_string)
 
         # Create PIL Image from bytes
         image = Image.open(io.BytesIO(image_bytes))
 
-        # Convert to RGB if necessary (some formats like RGBA need conversion for JPEG)
-        if image.mode in ('RGBA', 'LA', 'P'):
-            # Create a white background
-            background = Image.new('RGB', image.size, (255, 255, 255))
-            if image.mode == 'P':
-                image = image.convert('RGBA')
-            background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-            image = background
-        elif image.mode != 'RGB':
-            image = image.convert('RGB')
+        image = _flatten_to_rgb(image)
 
-        logger.info(f"Decoded {image_format} image: {image.size[0]}x{image.size[1]} pixels")
+        logger.info("Decoded %s image: %dx%d pixels", image_format, image.size[0], image.size[1])
 
         return image
 
-    except base64.binascii.Error as e:
-        logger.error(f"Base64 decoding error: {e}")
-        raise ValueError(f"Invalid base64 encoding: {e}")
+    except ValueError:
+        raise
 
     except Exception as e:
-        logger.error(f"Image decoding error: {e}")
+        logger.error("Image decoding error: %s", e)
         raise ValueError(f"Failed to decode image: {e}")
 
 
+def _optimize_fast(image_bytes: Union[bytes, bytearray], max_width: int, max_height: int, quality: int) -> Tuple[bytes, int, int]:
+    """
+    Fused decode -> resize -> compress pass over raw image bytes
+
+    Small JPEGs that already fit the limits are returned untouched. Otherwise
+    JPEGs are draft-decoded at reduced scale, the white-background composite
+    only runs for transparent modes, and the thumbnail is resized in place
+    before being written straight to the output buffer.
+
+    Args:
+        image_bytes: Raw (decoded) image file bytes
+        max_width: Maximum width in pixels
+        max_height: Maximum height in pixels
+        quality: JPEG compression quality (1-100)
+
+    Returns:
+        Tuple of (compressed_image_bytes, width, height)
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+
+    # Already a small JPEG within limits: re-encoding would only cost CPU
+    if (image.format == 'JPEG' and image.mode in ('RGB', 'L')
+            and image.size[0] <= max_width and image.size[1] <= max_height
+            and len(image_bytes) <= PASSTHROUGH_MAX_BYTES):
+        return bytes(image_bytes), image.size[0], image.size[1]
+
+    try:
+        image.draft('RGB', (max_width, max_height))
+    except Exception:
+        pass
+
+    image = _flatten_to_rgb(image)
+    image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+
+    logger.debug("Fast path: %dx%d -> %d bytes (quality=%d)", image.size[0], image.size[1], buffer.tell(), quality)
+
+    # getvalue() hands over the BytesIO's internal bytes object without a copy
+    # (CPython shares it while no buffer views are exported), so this is free
+    return buffer.getvalue(), image.size[0], image.size[1]
+
+
+
+def optimize_image_bytes(
+    image_bytes: Union[bytes, bytearray],
+    max_width: int = MAX_WIDTH,
+    max_height: int = MAX_HEIGHT,
+    quality: int = JPEG_QUALITY
+) -> bytes:
+    """
+    Downscale and JPEG-recompress raw image file bytes
+
+    Args:
+        image_bytes: Raw image file bytes (any format Pillow can open)
+        max_width: Maximum width in pixels
+        max_height: Maximum height in pixels
+        quality: JPEG compression quality (1-100)
+
+    Returns:
+        Compressed JPEG bytes
+    """
+    try:
+        return _optimize_fast(image_bytes, max_width, max_height, quality)[0]
+    except Exception as e:
+        logger.error("Image optimization error: %s", e)
+        raise ValueError(f"Failed to optimize image: {e}")
+
 def resize_image(image: Image.Image, max_width: int = MAX_WIDTH, max_height: int = MAX_HEIGHT) -> Image.Image:
     """
     Resize an image while maintaining aspect ratio
@@ -102,14 +229,14 @@ def resize_image(image: Image.Image, max_width: int = MAX_WIDTH, max_height: int
         new_size = image.size
 
         if original_size != new_size:
-            logger.info(f"Resized image from {original_size[0]}x{original_size[1]} to {new_size[0]}x{new_size[1]}")
+            logger.info("Resized image from %dx%d to %dx%d", original_size[0], original_size[1], new_size[0], new_size[1])
         else:
-            logger.info(f"Image already within limits: {original_size[0]}x{original_size[1]}")
+            logger.info("Image already within limits: %dx%d", original_size[0], original_size[1])
 
         return image
 
     except Exception as e:
-        logger.error(f"Image resize error: {e}")
+        logger.error("Image resize error: %s", e)
         raise ValueError(f"Failed to resize image: {e}")
 
 
@@ -144,14 +271,15 @@ def compress_image(image: Image.Image, quality: int = JPEG_QUALITY, grayscale: b
             progressive=True
         )
 
+        # Zero-copy: BytesIO shares its internal bytes object with the result
         compressed_bytes = buffer.getvalue()
 
-        logger.info(f"Compressed image to {len(compressed_bytes)} bytes (quality={quality})")
+        logger.info("Compressed image to %d bytes (quality=%d)", len(compressed_bytes), quality)
 
         return compressed_bytes
 
     except Exception as e:
-        logger.error(f"Image compression error: {e}")
+        logger.error("Image compression error: %s", e)
         raise ValueError(f"Failed to compress image: {e}")
 
 
@@ -169,41 +297,206 @@ def optimize_image(base64_string: str, max_width: int = MAX_WIDTH, max_height: i
         Tuple of (compressed_image_bytes, optimization_info_dict)
     """
     try:
-        # Decode base64 to PIL Image
-        image = decode_base64_image(base64_string)
-        original_size = len(base64_string.split(',')[1].encode())
-        original_width, original_height = image.size
-
-        # Resize if necessary
-        image = resize_image(image, max_width, max_height)
-        final_width, final_height = image.size
-
-        # Compress to JPEG
-        compressed_bytes = compress_image(image, quality)
-        compressed_size = len(compressed_bytes)
-
-        # Calculate compression ratio
-        compression_ratio = compressed_size / original_size if original_size > 0 else 0
-
-        optimization_info = {
-            'original_size': original_size,
-            'optimized_size': compressed_size,
-            'compression_ratio': round(compression_ratio, 2),
-            'width': final_width,
-            'height': final_height,
-            'saved_bytes': original_size - compressed_size,
-            'saved_percentage': round((1 - compression_ratio) * 100, 1)
-        }
+        # Decode base64, then resize and compress in a single fused pass
+        _, image_bytes = _decode_data_url(base64_string)
+        # Payload length without slicing: the comma sits within the short prefix
+        original_size = len(base64_string) - base64_string.find(',', 0, 64) - 1
+
+        return _optimize_with_info(image_bytes, original_size, max_width, max_height, quality)
+
+    except Exception as e:
+        logger.error("Image optimization error: %s", e)
+        raise ValueError(f"Failed to optimize image: {e}")
 
-        logger.info(f"Optimization complete: {optimization_info['saved_percentage']}% size reduction")
 
-        return compressed_bytes, optimization_info
+def optimize_image_file(image_bytes: bytes, max_width: int = MAX_WIDTH, max_height: int = MAX_HEIGHT, quality: int = JPEG_QUALITY) -> Tuple[bytes, dict]:
+    """
+    Same pipeline as optimize_image for raw file bytes (multipart uploads):
+    no base64 decoding step
+
+    Args:
+        image_bytes: Raw image file bytes
+        max_width: Maximum width in pixels
+        max_height: Maximum height in pixels
+        quality: JPEG compression quality (1-100)
 
+    Returns:
+        Tuple of (compressed_image_bytes, optimization_info_dict)
+    """
+    try:
+        return _optimize_with_info(image_bytes, len(image_bytes), max_width, max_height, quality)
     except Exception as e:
-        logger.error(f"Image optimization error: {e}")
+        logger.error("Image optimization error: %s", e)
         raise ValueError(f"Failed to optimize image: {e}")
 
 
+def _optimize_with_info(
+    image_bytes: Union[bytes, bytearray],
+    original_size: int,
+    max_width: int,
+    max_height: int,
+    quality: int
+) -> Tuple[bytes, dict]:
+    """Resize/compress image bytes and report the size reduction against original_size"""
+    compressed_bytes, final_width, final_height = _optimize_fast(image_bytes, max_width, max_height, quality)
+    compressed_size = len(compressed_bytes)
+
+    # Calculate compression ratio
+    compression_ratio = compressed_size / original_size if original_size > 0 else 0
+
+    optimization_info = {
+        'original_size': original_size,
+        'optimized_size': compressed_size,
+        'compression_ratio': round(compression_ratio, 2),
+        'width': final_width,
+        'height': final_height,
+        'saved_bytes': original_size - compressed_size,
+        'saved_percentage': round((1 - compression_ratio) * 100, 1)
+    }
+
+    logger.debug("Optimization complete: %s%% size reduction", optimization_info['saved_percentage'])
+
+    return compressed_bytes, optimization_info
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """
+    Return the shared process pool, creating it on first use
+
+    Returns:
+        ProcessPoolExecutor with one worker per CPU
+    """
+    global _PROCESS_POOL
+
+    if _PROCESS_POOL is None:
+        _PROCESS_POOL = ProcessPoolExecutor(max_workers=os.cpu_count())
+
+    return _PROCESS_POOL
+
+
+def _image_sizes(names, max_sides: Optional[Dict[str, int]]) -> Dict[str, Tuple[int, int]]:
+    """(max_width, max_height) for each image, honouring per-image overrides"""
+    max_sides = max_sides or {}
+    return {
+        name: (max_sides[name], max_sides[name]) if name in max_sides else (MAX_WIDTH, MAX_HEIGHT)
+        for name in names
+    }
+
+
+def optimize_images_batch(
+    base64_images: Dict[str, str],
+    max_sides: Optional[Dict[str, int]] = None
+) -> Dict[str, Tuple[bytes, dict]]:
+    """
+    Optimize several base64 images in parallel worker processes
+    JPEG decode/encode is CPU-bound, so processes scale where threads would
+    contend for the GIL between codec calls
+
+    Args:
+        base64_images: Base64 data URL strings keyed by image name
+        max_sides: Optional per-image long-edge limit (default MAX_WIDTH x MAX_HEIGHT)
+
+    Returns:
+        Dictionary mapping each name to (compressed_image_bytes, optimization_info_dict)
+
+    Raises:
+        ValueError: If any image fails to optimize (the message names the image)
+    """
+    names = list(base64_images)
+    sizes = _image_sizes(names, max_sides)
+
+    if len(names) < 2:
+        return {name: optimize_image(base64_images[name], *sizes[name]) for name in names}
+
+    futures = {
+        name: _get_process_pool().submit(optimize_image, base64_images[name], *sizes[name])
+        for name in names
+    }
+
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            logger.error("Batch optimization failed for '%s': %s", name, e)
+            raise ValueError(f"Failed to optimize '{name}': {e}")
+
+    return results
+
+
+async def optimize_images_batch_async(
+    base64_images: Dict[str, str],
+    max_sides: Optional[Dict[str, int]] = None
+) -> Dict[str, Tuple[bytes, dict]]:
+    """
+    Async counterpart of optimize_images_batch: the event loop keeps serving
+    other requests while the workers decode/resize/encode
+
+    Args:
+        base64_images: Base64 data URL strings keyed by image name
+        max_sides: Optional per-image long-edge limit (default MAX_WIDTH x MAX_HEIGHT)
+
+    Returns:
+        Dictionary mapping each name to (compressed_image_bytes, optimization_info_dict)
+
+    Raises:
+        ValueError: If any image fails to optimize (the message names the image)
+    """
+    return await _optimize_batch_async(optimize_image, base64_images, max_sides)
+
+
+async def optimize_image_files_batch_async(
+    raw_images: Dict[str, bytes],
+    max_sides: Optional[Dict[str, int]] = None
+) -> Dict[str, Tuple[bytes, dict]]:
+    """
+    optimize_images_batch_async for raw file bytes (multipart uploads)
+
+    Args:
+        raw_images: Raw image file bytes keyed by image name
+        max_sides: Optional per-image long-edge limit (default MAX_WIDTH x MAX_HEIGHT)
+
+    Returns:
+        Dictionary mapping each name to (compressed_image_bytes, optimization_info_dict)
+
+    Raises:
+        ValueError: If any image fails to optimize (the message names the image)
+    """
+    return await _optimize_batch_async(optimize_image_file, raw_images, max_sides)
+
+
+async def _optimize_batch_async(
+    optimize: Callable[..., Tuple[bytes, dict]],
+    images: Dict[str, Any],
+    max_sides: Optional[Dict[str, int]]
+) -> Dict[str, Tuple[bytes, dict]]:
+    loop = asyncio.get_running_loop()
+    # A single image is not worth the pickling round-trip: use the default thread pool
+    executor = _get_process_pool() if len(images) > 1 else None
+    sizes = _image_sizes(images, max_sides)
+
+    async def run(name: str) -> Tuple[bytes, dict]:
+        try:
+            return await loop.run_in_executor(executor, optimize, images[name], *sizes[name])
+        except Exception as e:
+            logger.error("Batch optimization failed for '%s': %s", name, e)
+            raise ValueError(f"Failed to optimize '{name}': {e}")
+
+    results = await asyncio.gather(*(run(name) for name in images))
+    return dict(zip(images, results))
+
+
+def shutdown_process_pool() -> None:
+    """
+    Stop the shared optimization worker processes (app shutdown)
+    """
+    global _PROCESS_POOL
+
+    if _PROCESS_POOL is not None:
+        _PROCESS_POOL.shutdown(wait=False, cancel_futures=True)
+        _PROCESS_POOL = None
+
+
 def save_optimized_image(image_bytes: bytes, file_path: str) -> None:
     """
     Save optimized image bytes to a file
@@ -216,16 +509,40 @@ def save_optimized_image(image_bytes: bytes, file_path: str) -> None:
         with open(file_path, 'wb') as f:
             f.write(image_bytes)
 
-        logger.info(f"Saved optimized image to: {file_path}")
+        logger.info("Saved optimized image to: %s", file_path)
 
     except Exception as e:
-        logger.error(f"Error saving image: {e}")
+        logger.error("Error saving image: %s", e)
         raise IOError(f"Failed to save image: {e}")
 
 
+def _write_files(files: Dict[str, bytes]) -> None:
+    for file_path, image_bytes in files.items():
+        save_optimized_image(image_bytes, file_path)
+
+
+async def save_optimized_images(images: Dict[str, bytes], directory: str) -> Dict[str, str]:
+    """
+    Save a batch of optimized images without blocking the event loop
+    All writes are handed to a single worker thread in one submission
+
+    Args:
+        images: Dictionary mapping image name to JPEG bytes
+        directory: Directory where the files are written as <name>.jpg
+
+    Returns:
+        Dictionary mapping image name to the saved file path
+    """
+    paths = {name: os.path.join(directory, f"{name}.jpg") for name in images}
+    await asyncio.to_thread(_write_files, {paths[name]: data for name, data in images.items()})
+    return paths
+
+
 def get_image_info(base64_string: str) -> dict:
     """
     Extract basic information from a base64 image without full optimization
+    Only the first HEADER_PEEK_CHARS of the payload are decoded; the full image
+    is decoded only when the header does not fit in that window
 
     Args:
         base64_string: Base64 data URL string
@@ -234,16 +551,27 @@ def get_image_info(base64_string: str) -> dict:
         Dictionary with image information
     """
     try:
-        image = decode_base64_image(base64_string)
+        if not base64_string.startswith('data:image/'):
+            raise ValueError("Invalid data URL format. Must start with 'data:image/'")
+
+        comma = base64_string.find(',', 0, 64)
+        header_chunk = base64_string[comma + 1:comma + 1 + HEADER_PEEK_CHARS]
+
+        try:
+            # Image.open only parses the header; pixel data is never loaded
+            image = Image.open(io.BytesIO(pybase64.b64decode(header_chunk, validate=True)))
+        except Exception:
+            # Large metadata blocks (e.g. EXIF) push the header past the window
+            image = decode_base64_image(base64_string)
 
         return {
             'width': image.size[0],
             'height': image.size[1],
             'mode': image.mode,
             'format': image.format,
-            'size_bytes': len(base64_string.split(',')[1].encode())
+            'size_bytes': len(base64_string) - comma - 1
         }
 
     except Exception as e:
-        logger.error(f"Error getting image info: {e}")
+        logger.error("Error getting image info: %s", e)
         raise ValueError(f"Failed to get image info: {e}")
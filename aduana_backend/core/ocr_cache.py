@@ -0,0 +1,101 @@
+"""
+OCR Result Cache
+Content-addressed cache for Vision API extractions, keyed by SHA-256 of the
+image bytes + prompt + model so identical submissions skip the API call.
+main.py also stores whole validation responses here (keyed by the optimized
+images, driver name and day)
+"""
+
+import os
+import hashlib
+import logging
+from typing import Dict, Any, Optional, Union
+
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+    logging.warning("diskcache not available, OCR cache is in-memory only. Install with: pip install diskcache")
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "true").lower() != "false"
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", "./ocr_cache")
+MEMORY_CACHE_MAX_ENTRIES = 1024
+
+_CACHE = None
+
+
+def _get_cache():
+    """Return the shared cache store, creating it on first use"""
+    global _CACHE
+
+    if _CACHE is None:
+        _CACHE = diskcache.Cache(OCR_CACHE_DIR) if DISKCACHE_AVAILABLE else {}
+
+    return _CACHE
+
+
+def cache_key(*parts: Union[bytes, str]) -> str:
+    """
+    Build a stable cache key (survives process restarts, unlike hash())
+
+    Args:
+        parts: Image bytes, prompt text, model name, ...
+
+    Returns:
+        Hex SHA-256 digest over all parts
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8') if isinstance(part, str) else part)
+        digest.update(b"|")
+    return digest.hexdigest()
+
+
+def get_cached(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Look up a cached extraction
+
+    Args:
+        key: Key from cache_key()
+
+    Returns:
+        Cached extraction dict, or None on a miss (or when caching is disabled)
+    """
+    if not OCR_CACHE_ENABLED:
+        return None
+
+    try:
+        value = _get_cache().get(key)
+    except Exception as e:
+        logger.warning("OCR cache read failed: %s", e)
+        return None
+
+    if value is not None:
+        logger.info("OCR cache hit: %s", key[:12])
+    return value
+
+
+def set_cached(key: str, value: Dict[str, Any]) -> None:
+    """
+    Store an extraction in the cache (failures are logged, never raised)
+
+    Args:
+        key: Key from cache_key()
+        value: Parsed extraction dict
+    """
+    if not OCR_CACHE_ENABLED:
+        return
+
+    try:
+        cache = _get_cache()
+        if not DISKCACHE_AVAILABLE and len(cache) >= MEMORY_CACHE_MAX_ENTRIES:
+            # Drop the oldest entry (dicts keep insertion order)
+            cache.pop(next(iter(cache)))
+        cache[key] = value
+    except Exception as e:
+        logger.warning("OCR cache write failed: %s", e)
@@ -4,14 +4,24 @@ Uses OpenAI's GPT-4 Vision API to extract structured data from document images
 """
 
 import os
-import base64
+import asyncio
+import hashlib
 import json
 import logging
-import time
-from typing import Dict, Any, Optional
-from openai import OpenAI
+import random
+import re
+from typing import Dict, Any, Optional, Type, TypeVar, Union, get_args, get_origin
+import httpx
+import orjson
+import pybase64
+from openai import AsyncOpenAI, AsyncStream, APIStatusError
 from dotenv import load_dotenv
 
+from pydantic import BaseModel
+
+from core.request_limiter import AsyncRequestLimiter
+from core.image_optimizer import optimize_image_bytes
+from core.ocr_cache import cache_key, get_cached, set_cached
 from models.schemas import (
     ExtractedDODAData,
     ExtractedManifestData,
@@ -20,6 +30,8 @@ from models.schemas import (
     AllExtractedData
 )
 
+ModelT = TypeVar('ModelT', bound=BaseModel)
+
 # Load environment variables
 load_dotenv()
 
@@ -30,37 +42,137 @@ logger = logging.getLogger(__name__)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")  
 MAX_RETRIES = 3
-RETRY_DELAY = 2  # seconds
-
-
-def get_openai_client() -> OpenAI:
+RETRY_DELAY = 2  # seconds (base for exponential backoff)
+MAX_RETRY_DELAY = 30  # seconds
+# 4xx statuses that are still worth retrying (timeout, conflict, rate limit)
+RETRYABLE_CLIENT_ERRORS = {408, 409, 429}
+# Statuses whose Retry-After header we honour
+RETRY_AFTER_STATUSES = {429, 503}
+HTTP_TIMEOUT = 30  # seconds
+# Keep idle connections open between requests (httpx default is 5s) so the next
+# validation reuses the warm HTTP/2 connection instead of a new TLS handshake
+HTTP_KEEPALIVE_EXPIRY = 300  # seconds
+# Connection pool shared by every call of a client (sync and async clients use the same sizing)
+HTTP_LIMITS = httpx.Limits(
+    max_keepalive_connections=32, max_connections=64, keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+)
+# Vision "detail" per document type: two-line plate reads do not need high detail
+DOCUMENT_IMAGE_DETAIL = "high"
+PLATE_IMAGE_DETAIL = os.getenv("PLATE_IMAGE_DETAIL", "low")
+# Long-edge limit for images read from disk before they are sent to the API
+ENCODE_MAX_SIDE = 1568
+ENCODE_JPEG_QUALITY = 85
+# In-flight Vision API calls allowed at once (keeps concurrent extractions under rate limits)
+MAX_CONCURRENT_REQUESTS = int(os.getenv("OPENAI_MAX_CONCURRENT_REQUESTS", "5"))
+# Account request budget used to smooth bursts (0 = no rate limiting)
+OPENAI_REQUESTS_PER_MINUTE = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "0"))
+# "true" sends all 5 images in one call; otherwise one concurrent call per document
+UNIFIED_SINGLE_CALL = os.getenv("OCR_UNIFIED_SINGLE_CALL", "false").lower() == "true"
+
+# Optional ```json ... ``` markdown fence around the model's JSON body
+_FENCE_RE = re.compile(r'^\s*(?:```(?:json)?\s*)?(.*?)(?:\s*```)?\s*$', re.DOTALL)
+
+# Shared client, created on first use and reused for the life of the process
+_CLIENT: Optional[AsyncOpenAI] = None
+_REQUEST_LIMITER: Optional[AsyncRequestLimiter] = None
+
+
+def get_openai_client() -> AsyncOpenAI:
     """
-    Initialize and return OpenAI client
+    Return the shared async OpenAI client, creating it on first use
 
     Returns:
-        OpenAI client instance
+        AsyncOpenAI client instance
 
     Raises:
         ValueError: If API key is not configured
     """
-    if not OPENAI_API_KEY:
-        raise ValueError("OPENAI_API_KEY not found in environment variables")
+    global _CLIENT
 
-    return OpenAI(api_key=OPENAI_API_KEY)
+    if _CLIENT is None:
+        if not OPENAI_API_KEY:
+            raise ValueError("OPENAI_API_KEY not found in environment variables")
 
+        # Keep-alive pool + HTTP/2 so later calls reuse a warm TLS connection
+        http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(HTTP_TIMEOUT),
+            limits=HTTP_LIMITS
+        )
+        # SDK retries off: call_openai_vision_api owns the retry policy
+        _CLIENT = AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=http_client, max_retries=0)
+
+    return _CLIENT
 
-def encode_image_to_base64(image_path: str) -> str:
+
+def get_request_limiter() -> AsyncRequestLimiter:
     """
-    Encode an image file to base64 string
+    Return the shared request limiter for the running event loop, creating it
+    on first use; every Vision API call goes through it
+
+    Returns:
+        AsyncRequestLimiter instance
+    """
+    global _REQUEST_LIMITER
+
+    if _REQUEST_LIMITER is None or _REQUEST_LIMITER.loop is not asyncio.get_running_loop():
+        _REQUEST_LIMITER = AsyncRequestLimiter(
+            max_concurrency=MAX_CONCURRENT_REQUESTS,
+            requests_per_minute=OPENAI_REQUESTS_PER_MINUTE or None
+        )
+
+    return _REQUEST_LIMITER
+
+
+async def close_openai_client() -> None:
+    """
+    Close the shared OpenAI client and its connection pool (app shutdown)
+    """
+    global _CLIENT, _REQUEST_LIMITER
+
+    _REQUEST_LIMITER = None
+
+    if _CLIENT is not None:
+        await _CLIENT.close()
+        _CLIENT = None
+
+
+def to_data_url(image_bytes: bytes) -> str:
+    """
+    Build the JPEG data URL sent to the Vision API
+    pybase64 encodes straight to a str, so the only copy is the final concat
 
     Args:
-        image_path: Path to the image file
+        image_bytes: JPEG image bytes
 
     Returns:
-        Base64 encoded string
+        data:image/jpeg;base64,... string
+    """
+    return "data:image/jpeg;base64," + pybase64.b64encode_as_string(image_bytes)
+
+
+def _read_file(path: str) -> bytes:
+    """
+    Read an image file, downscaled and JPEG-recompressed so raw phone photos
+    do not turn into megabytes of image tokens (small JPEGs pass through as-is)
+    """
+    with open(path, "rb") as image_file:
+        return optimize_image_bytes(image_file.read(), ENCODE_MAX_SIDE, ENCODE_MAX_SIDE, ENCODE_JPEG_QUALITY)
+
+
+async def read_image_files(paths: Dict[str, str]) -> Dict[str, bytes]:
     """
-    with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode('utf-8')
+    Read and downscale several image files concurrently in worker threads, so
+    the reads overlap each other and do not block the event loop
+
+    Args:
+        paths: Dictionary mapping image name to file path
+
+    Returns:
+        Dictionary mapping image name to JPEG bytes ready for the Vision API
+    """
+    contents = await asyncio.gather(*(asyncio.to_thread(_read_file, path) for path in paths.values()))
+    return dict(zip(paths, contents))
 
 
 def create_doda_prompt() -> str:
@@ -70,20 +182,12 @@ def create_doda_prompt() -> str:
     Returns:
         Prompt string for DODA extraction
     """
-    return """Analiza este documento DODA (Declaración de Operación de Despacho Aduanero) y extrae la siguiente información EXACTAMENTE en formato JSON.
-
-IMPORTANTE: Responde ÚNICAMENTE con el objeto JSON, sin texto adicional antes o después.
+    return """Analiza este documento DODA (Declaración de Operación de Despacho Aduanero) y extrae la siguiente información.
 
 Campos requeridos:
 - fecha_emision: Fecha de emisión del documento en formato YYYY-MM-DD
 - seccion_aduanera: Sección aduanera (ciudad/puerto)
 
-Formato de respuesta (SOLO JSON):
-{
-  "fecha_emision": "YYYY-MM-DD",
-  "seccion_aduanera": "string"
-}
-
 Si no encuentras algún dato, usa "NO_ENCONTRADO" como valor."""
 
 
@@ -94,9 +198,7 @@ def create_manifest_prompt() -> str:
     Returns:
         Prompt string for E-Manifest extraction
     """
-    return """Analiza este documento E-Manifest (Manifiesto Electrónico) y extrae la siguiente información EXACTAMENTE en formato JSON.
-
-IMPORTANTE: Responde ÚNICAMENTE con el objeto JSON, sin texto adicional antes o después.
+    return """Analiza este documento E-Manifest (Manifiesto Electrónico) y extrae la siguiente información.
 
 INSTRUCCIONES ESPECIALES DE PLACAS:
 - Busca la seccion etiquetada como "Plate(s)".
@@ -115,19 +217,6 @@ Campos requeridos:
 - cantidad: Cantidad numérica (solo el número, sin unidades)
 - peso_monto: Peso o monto (solo el número, sin unidades ni símbolos)
 
-Formato de respuesta (SOLO JSON):
-{
-  "placa_tracto": "string",
-  "placa_remolque": "string",
-  "nombre_operador": "string",
-  "aduana_arribo": "string",
-  "numero_entry": "string",
-  "broker": "string",
-  "descripcion_mercancia": "string",
-  "cantidad": number,
-  "peso_monto": number
-}
-
 Si no encuentras algún dato, usa "NO_ENCONTRADO" para strings o 0 para números."""
 
 
@@ -138,9 +227,7 @@ def create_prefile_prompt() -> str:
     Returns:
         Prompt string for Prefile extraction
     """
-    return """Analiza este documento Prefile (Pre-declaración) y extrae la siguiente información EXACTAMENTE en formato JSON.
-
-IMPORTANTE: Responde ÚNICAMENTE con el objeto JSON, sin texto adicional antes o después.
+    return """Analiza este documento Prefile (Pre-declaración) y extrae la siguiente información.
 
 Campos requeridos:
 - numero_entry: Número de entry/entrada
@@ -149,15 +236,6 @@ Campos requeridos:
 - cantidad: Cantidad numérica (solo el número, sin unidades)
 - peso_monto: Peso o monto (solo el número, sin unidades ni símbolos)
 
-Formato de respuesta (SOLO JSON):
-{
-  "numero_entry": "string",
-  "broker": "string",
-  "descripcion_mercancia": "string",
-  "cantidad": number,
-  "peso_monto": number
-}
-
 Si no encuentras algún dato, usa "NO_ENCONTRADO" para strings o 0 para números."""
 
 
@@ -168,21 +246,153 @@ def create_plate_prompt() -> str:
     Returns:
         Prompt string for plate extraction
     """
-    return """Analiza esta foto de placa vehicular y extrae el número de placa EXACTAMENTE en formato JSON.
-
-IMPORTANTE: Responde ÚNICAMENTE con el objeto JSON, sin texto adicional antes o después.
+    return """Analiza esta foto de placa vehicular y extrae el número de placa.
 
 Campos requeridos:
 - plate_number: Número de placa (letras y números como aparecen)
 - confidence: Tu nivel de confianza en la lectura (0.0 a 1.0)
 
-Formato de respuesta (SOLO JSON):
-{
-  "plate_number": "string",
-  "confidence": number
+Si no puedes leer la placa claramente, usa "NO_LEGIBLE" y confidence menor a 0.5."""
+
+
+def create_unified_prompt() -> str:
+    """
+    Create the prompt for extracting ALL 5 documents in one response
+
+    Returns:
+        Prompt string for unified extraction
+    """
+    return """Analiza estas 5 imágenes de documentos aduanales y extrae TODA la información en UN SOLO objeto (doda, manifest, prefile, tractor_plate, trailer_plate).
+
+Imágenes en orden:
+1. DODA (Declaración de Operación de Despacho Aduanero)
+2. E-Manifest (Manifiesto Electrónico)
+3. Prefile (Pre-declaración)
+4. Foto de placa del tracto
+5. Foto de placa del remolque
+
+Reglas:
+- Si no encuentras algún dato: usa "NO_ENCONTRADO" para strings, 0 para números, 0.5 para confidence
+- Para placas no legibles: usa "NO_LEGIBLE" y confidence < 0.5"""
+
+
+# Prompts are static: build them once at import instead of on every extraction
+_DODA_PROMPT = create_doda_prompt()
+_MANIFEST_PROMPT = create_manifest_prompt()
+_PREFILE_PROMPT = create_prefile_prompt()
+_PLATE_PROMPT = create_plate_prompt()
+_UNIFIED_PROMPT = create_unified_prompt()
+
+# Cache keys use the prompt digest, so the multi-KB prompt is hashed once here
+_PROMPT_DIGESTS = {
+    prompt: hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    for prompt in (_DODA_PROMPT, _MANIFEST_PROMPT, _PREFILE_PROMPT, _PLATE_PROMPT, _UNIFIED_PROMPT)
 }
 
-Si no puedes leer la placa claramente, usa "NO_LEGIBLE" y confidence menor a 0.5."""
+# Per-document extraction settings:
+# AllExtractedData field -> (image key, prompt, result model, vision detail)
+DOCUMENT_EXTRACTIONS = {
+    'doda': ('doda', _DODA_PROMPT, ExtractedDODAData, DOCUMENT_IMAGE_DETAIL),
+    'manifest': ('manifest', _MANIFEST_PROMPT, ExtractedManifestData, DOCUMENT_IMAGE_DETAIL),
+    'prefile': ('prefile', _PREFILE_PROMPT, ExtractedPrefileData, DOCUMENT_IMAGE_DETAIL),
+    'tractor_plate': ('tractor', _PLATE_PROMPT, ExtractedPlateData, PLATE_IMAGE_DETAIL),
+    'trailer_plate': ('trailer', _PLATE_PROMPT, ExtractedPlateData, PLATE_IMAGE_DETAIL)
+}
+
+
+def strict_json_schema(model_cls: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Convert a Pydantic model's JSON schema to the subset accepted by
+    Structured Outputs in strict mode (every field required, no extra keys,
+    no titles/defaults/examples; Optional[x] becomes a nullable type)
+
+    Args:
+        model_cls: Pydantic model describing the expected object
+
+    Returns:
+        JSON schema dict
+    """
+    schema = model_cls.model_json_schema()
+    properties = {}
+
+    for name, prop in schema["properties"].items():
+        if "anyOf" in prop:
+            field_type = [option["type"] for option in prop["anyOf"]]
+        else:
+            field_type = prop["type"]
+        properties[name] = {"type": field_type, "description": prop.get("description", "")}
+
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+
+def schema_response_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Wrap a strict JSON Schema as a Structured Outputs response_format"""
+    return {"type": "json_schema", "json_schema": {"name": name, "schema": schema, "strict": True}}
+
+
+# Structured Outputs format per prompt: the model is constrained to the schema,
+# so the prompts no longer spell out the JSON layout
+JSON_OBJECT_FORMAT = {"type": "json_object"}
+_RESPONSE_FORMATS = {
+    prompt: schema_response_format(model_cls.__name__, strict_json_schema(model_cls))
+    for _, prompt, model_cls, _ in DOCUMENT_EXTRACTIONS.values()
+}
+_UNIFIED_SCHEMA = {
+    "type": "object",
+    "properties": {
+        field: strict_json_schema(model_cls)
+        for field, (_, _, model_cls, _) in DOCUMENT_EXTRACTIONS.items()
+    },
+    "required": list(DOCUMENT_EXTRACTIONS),
+    "additionalProperties": False
+}
+_RESPONSE_FORMATS[_UNIFIED_PROMPT] = schema_response_format("AllExtractedData", _UNIFIED_SCHEMA)
+
+
+def _prompt_digest(prompt: str) -> str:
+    digest = _PROMPT_DIGESTS.get(prompt)
+    return digest if digest is not None else hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+
+def _allowed_types(annotation: Any) -> tuple:
+    """Exact runtime types accepted without coercion for a field annotation"""
+    if get_origin(annotation) is Union:
+        return tuple(type(None) if arg is type(None) else arg for arg in get_args(annotation))
+    return (annotation,)
+
+
+# Per-model {field: exact types} used to detect schema-conformant responses
+_FAST_PATH_TYPES = {
+    model: {name: _allowed_types(field.annotation) for name, field in model.model_fields.items()}
+    for model in (ExtractedDODAData, ExtractedManifestData, ExtractedPrefileData, ExtractedPlateData)
+}
+
+
+def build_extracted_model(model_cls: Type[ModelT], data: Dict[str, Any]) -> ModelT:
+    """
+    Build an extraction model, skipping Pydantic validation when the response
+    already has exactly the expected keys with exactly the expected types
+
+    Args:
+        model_cls: Extracted*Data model class
+        data: Parsed JSON object from the API
+
+    Returns:
+        Model instance (validated normally when the fast path does not apply)
+    """
+    field_types = _FAST_PATH_TYPES[model_cls]
+
+    if data.keys() == field_types.keys() and all(
+        type(data[name]) in types for name, types in field_types.items()
+    ):
+        return model_cls.model_construct(**data)
+
+    return model_cls.model_validate(data)
 
 
 def extract_json_from_response(response_text: str) -> Dict[str, Any]:
@@ -198,188 +408,435 @@ def extract_json_from_response(response_text: str) -> Dict[str, Any]:
     Raises:
         ValueError: If JSON cannot be extracted or parsed
     """
-    # Remove markdown code blocks if present
     text = response_text.strip()
 
-    # Remove ```json and ``` markers
-    if text.startswith("```json"):
-        text = text[7:]
-    elif text.startswith("```"):
-        text = text[3:]
-
-    if text.endswith("```"):
-        text = text[:-3]
-
-    text = text.strip()
+    # json_object mode returns bare JSON; only fenced replies need the regex
+    if text[:1] != '{':
+        text = _FENCE_RE.match(text).group(1)
 
     # Parse JSON
     try:
-        return json.loads(text)
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse JSON: {e}")
-        logger.error(f"Response text: {text}")
+        return orjson.loads(text)
+    except orjson.JSONDecodeError as e:
+        logger.error("Failed to parse JSON: %s", e)
+        logger.error("Response text: %s", text)
         raise ValueError(f"Invalid JSON in API response: {e}")
 
 
-def call_openai_vision_api(
-    image_path: str,
-    prompt: str,
+async def read_streamed_json(stream: AsyncStream) -> str:
+    """
+    Accumulate a streamed completion, returning as soon as the text forms a
+    complete JSON object instead of waiting for the end-of-stream chunk
+
+    Args:
+        stream: Streaming chat completion from the OpenAI client
+
+    Returns:
+        Response text received so far
+    """
+    parts = []
+
+    async with stream:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            parts.append(delta)
+
+            # Only a closing brace can complete the top-level object
+            if delta.rstrip().endswith('}'):
+                text = ''.join(parts)
+                try:
+                    orjson.loads(text)
+                    return text
+                except orjson.JSONDecodeError:
+                    pass
+
+    return ''.join(parts)
+
+
+async def request_completion(client: AsyncOpenAI, request_body: Dict[str, Any]) -> str:
+    """
+    Run one streamed chat completion and return its text
+
+    Args:
+        client: OpenAI client
+        request_body: Keyword arguments for chat.completions.create
+
+    Returns:
+        Response text
+    """
+    stream = await client.chat.completions.create(**request_body, stream=True)
+    return await read_streamed_json(stream)
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """
+    Read the server's Retry-After hint from a 429/503 response
+
+    Args:
+        error: Exception raised by the API call
+
+    Returns:
+        Seconds the server asked us to wait, or None if there is no usable hint
+    """
+    if not isinstance(error, APIStatusError) or error.status_code not in RETRY_AFTER_STATUSES:
+        return None
+
+    headers = error.response.headers
+    try:
+        if headers.get("retry-after-ms") is not None:
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after") is not None:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass  # HTTP-date form: fall back to exponential backoff
+
+    return None
+
+
+def get_retry_delay(attempt: int, retry_delay: float = RETRY_DELAY, retry_after: Optional[float] = None) -> float:
+    """
+    Exponential backoff with jitter, so concurrent extractions that fail
+    together do not all retry in lockstep; a server Retry-After hint wins
+
+    Args:
+        attempt: Zero-based attempt number that just failed
+        retry_delay: Base delay in seconds
+        retry_after: Seconds requested by the server, if any
+
+    Returns:
+        Seconds to wait before the next attempt (capped at MAX_RETRY_DELAY)
+    """
+    if retry_after is not None:
+        return min(max(retry_after, 0.0), MAX_RETRY_DELAY)
+    return min(retry_delay * (2 ** attempt) + random.random(), MAX_RETRY_DELAY)
+
+
+def build_vision_request(image_bytes: bytes, prompt: str, detail: str = DOCUMENT_IMAGE_DETAIL) -> Dict[str, Any]:
+    """
+    Build the chat.completions body for a single-image extraction
+    Shared by the live API path and the Batch API JSONL builder
+
+    Args:
+        image_bytes: Optimized JPEG image bytes
+        prompt: Extraction prompt
+        detail: Vision detail level ("high" or "low")
+
+    Returns:
+        Keyword arguments for client.chat.completions.create
+    """
+    return {
+        "model": OPENAI_MODEL,
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": prompt
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": to_data_url(image_bytes),
+                            "detail": detail
+                        }
+                    }
+                ]
+            }
+        ],
+        "max_tokens": 300,  # Reduced from 1000 to 300 for cost optimization
+        "temperature": 0.1,  # Low temperature for consistent extraction
+        "response_format": _RESPONSE_FORMATS.get(prompt, JSON_OBJECT_FORMAT)  # Schema-constrained JSON
+    }
+
+
+async def request_json_with_retries(
+    request_body: Dict[str, Any],
     max_retries: int = MAX_RETRIES,
-    retry_delay: int = RETRY_DELAY
+    retry_delay: float = RETRY_DELAY
 ) -> Dict[str, Any]:
     """
-    Call OpenAI Vision API with retry logic
+    Send a chat completion request and parse its JSON reply, retrying
+    transient failures (5xx, 408/409/429, timeouts, connection errors and
+    unparseable replies) with jittered exponential backoff
 
     Args:
-        image_path: Path to the image file
-        prompt: Extraction prompt
-        max_retries: Maximum number of retry attempts
-        retry_delay: Delay between retries in seconds
+        request_body: Keyword arguments for chat.completions.create
+        max_retries: Maximum number of attempts
+        retry_delay: Base delay between retries in seconds (doubles per attempt)
 
     Returns:
-        Extracted data as dictionary
+        Parsed JSON reply
 
     Raises:
-        Exception: If all retry attempts fail
+        Exception: If all attempts fail or the API rejects the request (4xx)
     """
     client = get_openai_client()
 
-    # Encode image
-    base64_image = encode_image_to_base64(image_path)
-
     for attempt in range(max_retries):
         try:
-            logger.info(f"Calling OpenAI API (attempt {attempt + 1}/{max_retries})...")
+            logger.info("Calling OpenAI API (attempt %d/%d)...", attempt + 1, max_retries)
 
-            # Call GPT-4 Vision API
-            response = client.chat.completions.create(
-                model=OPENAI_MODEL,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": prompt
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}",
-                                    "detail": "high"  # High detail for accurate text extraction from complex documents
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=300,  # Reduced from 1000 to 300 for cost optimization
-                temperature=0.1,  # Low temperature for consistent extraction
-                response_format={"type": "json_object"}  # Force JSON response for better parsing
-            )
-
-            # Extract response text
-            response_text = response.choices[0].message.content
-            logger.info(f"Received response from OpenAI")
+            # Shares the concurrency/rate budget with calls from other in-flight trips
+            response_text = await get_request_limiter().run(request_completion, client, request_body)
 
-            # Parse JSON from response
-            extracted_data = extract_json_from_response(response_text)
+            logger.info("Received response from OpenAI")
 
-            logger.info(f"Successfully extracted data: {json.dumps(extracted_data, ensure_ascii=False)}")
-
-            return extracted_data
+            result = extract_json_from_response(response_text)
+            if attempt:
+                logger.info("OpenAI call succeeded after %d retr%s", attempt, "y" if attempt == 1 else "ies")
+            return result
 
         except json.JSONDecodeError as e:
-            logger.error(f"JSON parsing error on attempt {attempt + 1}: {e}")
+            logger.error("JSON parsing error on attempt %d: %s", attempt + 1, e)
             if attempt < max_retries - 1:
-                logger.info(f"Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
+                delay = get_retry_delay(attempt, retry_delay)
+                logger.info("Retrying in %.1f seconds...", delay)
+                await asyncio.sleep(delay)
             else:
                 raise Exception(f"Failed to parse valid JSON after {max_retries} attempts: {e}")
 
         except Exception as e:
-            logger.error(f"API call error on attempt {attempt + 1}: {e}")
+            logger.error("API call error on attempt %d: %s", attempt + 1, e)
+
+            # Client errors (bad request, auth, ...) will fail the same way again
+            if isinstance(e, APIStatusError) and e.status_code < 500 and e.status_code not in RETRYABLE_CLIENT_ERRORS:
+                raise Exception(f"OpenAI API rejected the request ({e.status_code}): {e}")
+
             if attempt < max_retries - 1:
-                logger.info(f"Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
+                delay = get_retry_delay(attempt, retry_delay, get_retry_after(e))
+                logger.info("Retrying in %.1f seconds...", delay)
+                await asyncio.sleep(delay)
             else:
                 raise Exception(f"OpenAI API call failed after {max_retries} attempts: {e}")
 
     raise Exception(f"Failed to extract data after {max_retries} attempts")
 
 
-def extract_doda_data(image_path: str) -> ExtractedDODAData:
+async def call_openai_vision_api(
+    image_bytes: bytes,
+    prompt: str,
+    detail: str = DOCUMENT_IMAGE_DETAIL,
+    max_retries: int = MAX_RETRIES,
+    retry_delay: int = RETRY_DELAY
+) -> Dict[str, Any]:
+    """
+    Call OpenAI Vision API with retry logic
+
+    Args:
+        image_bytes: Optimized JPEG image bytes
+        prompt: Extraction prompt
+        detail: Vision detail level ("high" or "low")
+        max_retries: Maximum number of retry attempts
+        retry_delay: Base delay between retries in seconds (doubles per attempt)
+
+    Returns:
+        Extracted data as dictionary
+
+    Raises:
+        Exception: If all retry attempts fail or the API rejects the request (4xx)
+    """
+    key = cache_key(image_bytes, _prompt_digest(prompt), OPENAI_MODEL, detail)
+    cached = get_cached(key)
+    if cached is not None:
+        return cached
+
+    # Build the request body (and its data URL) once, outside the retry loop
+    request_body = build_vision_request(image_bytes, prompt, detail)
+
+    extracted_data = await request_json_with_retries(request_body, max_retries, retry_delay)
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Successfully extracted data: %s", extracted_data)
+
+    set_cached(key, extracted_data)
+    return extracted_data
+
+
+async def extract_doda_data(image_bytes: bytes) -> ExtractedDODAData:
     """
     Extract data from DODA document
 
     Args:
-        image_path: Path to the DODA image file
+        image_bytes: Optimized JPEG bytes of the DODA image
 
     Returns:
         ExtractedDODAData object
     """
-    logger.info(f"Extracting DODA data from: {image_path}")
+    logger.info("Extracting DODA data (%d bytes)", len(image_bytes))
 
-    prompt = create_doda_prompt()
-    data = call_openai_vision_api(image_path, prompt)
+    data = await call_openai_vision_api(image_bytes, _DODA_PROMPT)
 
-    return ExtractedDODAData(**data)
+    return build_extracted_model(ExtractedDODAData, data)
 
 
-def extract_manifest_data(image_path: str) -> ExtractedManifestData:
+async def extract_manifest_data(image_bytes: bytes) -> ExtractedManifestData:
     """
     Extract data from E-Manifest document
 
     Args:
-        image_path: Path to the E-Manifest image file
+        image_bytes: Optimized JPEG bytes of the E-Manifest image
 
     Returns:
         ExtractedManifestData object
     """
-    logger.info(f"Extracting E-Manifest data from: {image_path}")
+    logger.info("Extracting E-Manifest data (%d bytes)", len(image_bytes))
 
-    prompt = create_manifest_prompt()
-    data = call_openai_vision_api(image_path, prompt)
+    data = await call_openai_vision_api(image_bytes, _MANIFEST_PROMPT)
 
-    return ExtractedManifestData(**data)
+    return build_extracted_model(ExtractedManifestData, data)
 
 
-def extract_prefile_data(image_path: str) -> ExtractedPrefileData:
+async def extract_prefile_data(image_bytes: bytes) -> ExtractedPrefileData:
     """
     Extract data from Prefile document
 
     Args:
-        image_path: Path to the Prefile image file
+        image_bytes: Optimized JPEG bytes of the Prefile image
 
     Returns:
         ExtractedPrefileData object
     """
-    logger.info(f"Extracting Prefile data from: {image_path}")
+    logger.info("Extracting Prefile data (%d bytes)", len(image_bytes))
 
-    prompt = create_prefile_prompt()
-    data = call_openai_vision_api(image_path, prompt)
+    data = await call_openai_vision_api(image_bytes, _PREFILE_PROMPT)
 
-    return ExtractedPrefileData(**data)
+    return build_extracted_model(ExtractedPrefileData, data)
 
 
-def extract_plate_data(image_path: str) -> ExtractedPlateData:
+async def extract_plate_data(image_bytes: bytes) -> ExtractedPlateData:
     """
     Extract license plate number from photo
 
     Args:
-        image_path: Path to the plate image file
+        image_bytes: Optimized JPEG bytes of the plate image
 
     Returns:
         ExtractedPlateData object
     """
-    logger.info(f"Extracting plate data from: {image_path}")
+    logger.info("Extracting plate data (%d bytes)", len(image_bytes))
+
+    data = await call_openai_vision_api(image_bytes, _PLATE_PROMPT, detail=PLATE_IMAGE_DETAIL)
+
+    return build_extracted_model(ExtractedPlateData, data)
+
+
+async def extract_all_documents(images: Dict[str, bytes]) -> AllExtractedData:
+    """
+    Extract data from all documents with one concurrent request per image
+    Wall time is the slowest single call instead of the sum of all five;
+    duplicate images within the trip are only sent once
+
+    Args:
+        images: Optimized JPEG bytes keyed by 'doda', 'manifest', 'prefile',
+                'tractor' and 'trailer'
+
+    Returns:
+        AllExtractedData object with all extracted data
+    """
+    # The same photo sent for two slots with the same prompt (e.g. one plate
+    # photo for tractor and trailer) is extracted once and shared
+    slot_requests = {
+        field: (images[image_key], prompt, detail)
+        for field, (image_key, prompt, _, detail) in DOCUMENT_EXTRACTIONS.items()
+    }
+    unique_requests = list(dict.fromkeys(slot_requests.values()))
+
+    logger.info("Extracting 5 documents concurrently (%d unique API calls)...", len(unique_requests))
 
-    prompt = create_plate_prompt()
-    data = call_openai_vision_api(image_path, prompt)
+    responses = await asyncio.gather(*(
+        call_openai_vision_api(image_bytes, prompt, detail=detail)
+        for image_bytes, prompt, detail in unique_requests
+    ))
+    results = dict(zip(unique_requests, responses))
 
-    return ExtractedPlateData(**data)
+    return AllExtractedData(**{
+        field: build_extracted_model(DOCUMENT_EXTRACTIONS[field][2], results[request])
+        for field, request in slot_requests.items()
+    })
 
 
-def extract_all_documents_unified(
+async def _call_unified_api(images_bytes: Dict[str, bytes], unified_prompt: str) -> Dict[str, Any]:
+    """
+    Send all 5 images in a single Vision API call and parse the JSON reply
+
+    Args:
+        images_bytes: JPEG bytes keyed doda/manifest/prefile/tractor/trailer
+        unified_prompt: Prompt describing the combined JSON layout
+
+    Returns:
+        Parsed response dict with one entry per document
+    """
+    image_urls = {name: to_data_url(data) for name, data in images_bytes.items()}
+
+    logger.info("Calling OpenAI API with all 5 images (unified call)...")
+
+    # Single API call with ALL 5 images
+    request_body = dict(
+        model=OPENAI_MODEL,
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    # Text prompt
+                    {"type": "text", "text": unified_prompt},
+                    # All 5 images with "high" detail for accurate text extraction
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": image_urls['doda'],
+                            "detail": DOCUMENT_IMAGE_DETAIL
+                        }
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": image_urls['manifest'],
+                            "detail": DOCUMENT_IMAGE_DETAIL
+                        }
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": image_urls['prefile'],
+                            "detail": DOCUMENT_IMAGE_DETAIL
+                        }
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": image_urls['tractor'],
+                            "detail": PLATE_IMAGE_DETAIL
+                        }
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": image_urls['trailer'],
+                            "detail": PLATE_IMAGE_DETAIL
+                        }
+                    }
+                ]
+            }
+        ],
+        max_tokens=800,  # Slightly higher for unified response
+        temperature=0.1,
+        response_format=_RESPONSE_FORMATS.get(unified_prompt, JSON_OBJECT_FORMAT)
+    )
+
+    # Same retry policy as the per-document calls: a transient 429/5xx must
+    # not fail the whole trip and make the driver re-upload all 5 photos
+    data = await request_json_with_retries(request_body)
+    logger.info("✓ Successfully parsed unified JSON response")
+
+    return data
+
+
+async def extract_all_documents_unified(
     doda_path: str,
     manifest_path: str,
     prefile_path: str,
@@ -387,8 +844,9 @@ def extract_all_documents_unified(
     trailer_plate_path: str
 ) -> AllExtractedData:
     """
-    OPTIMIZED: Extract data from ALL 5 images in a SINGLE API call
-    This reduces cost by ~80% and latency by ~75% compared to 5 separate calls
+    Extract data from all 5 images stored on disk
+    Reads the files concurrently and hands the bytes to
+    extract_all_documents_from_bytes
 
     Args:
         doda_path: Path to DODA document image
@@ -403,145 +861,61 @@ def extract_all_documents_unified(
     Raises:
         Exception: If extraction fails
     """
-    logger.info("=" * 70)
-    logger.info("UNIFIED EXTRACTION: Processing all 5 images in a single API call")
-    logger.info("=" * 70)
-
-    client = get_openai_client()
-
-    # Encode all 5 images to base64
-    logger.info("Encoding 5 images to base64...")
-    images_b64 = {
-        'doda': encode_image_to_base64(doda_path),
-        'manifest': encode_image_to_base64(manifest_path),
-        'prefile': encode_image_to_base64(prefile_path),
-        'tractor': encode_image_to_base64(tractor_plate_path),
-        'trailer': encode_image_to_base64(trailer_plate_path)
+    # Read each image once: the bytes feed both the cache key and the base64 payload
+    image_paths = {
+        'doda': doda_path,
+        'manifest': manifest_path,
+        'prefile': prefile_path,
+        'tractor': tractor_plate_path,
+        'trailer': trailer_plate_path
     }
-    logger.info("✓ All images encoded successfully")
+    return await extract_all_documents_from_bytes(await read_image_files(image_paths))
 
-    # Create unified prompt that extracts ALL data in one response
-    unified_prompt = """Analiza estas 5 imágenes de documentos aduanales y extrae TODA la información en UN SOLO objeto JSON.
 
-Imágenes en orden:
-1. DODA (Declaración de Operación de Despacho Aduanero)
-2. E-Manifest (Manifiesto Electrónico)
-3. Prefile (Pre-declaración)
-4. Foto de placa del tracto
-5. Foto de placa del remolque
+async def extract_all_documents_from_bytes(images_bytes: Dict[str, bytes]) -> AllExtractedData:
+    """
+    Extract data from all 5 images already held in memory
+    By default each document gets its own prompt and the 5 calls run
+    concurrently (wall time = slowest call); with OCR_UNIFIED_SINGLE_CALL=true
+    all images go in a SINGLE API call instead (~80% cheaper, but serialised)
 
-Extrae EXACTAMENTE estos campos en formato JSON (sin texto adicional antes o después):
-
-{
-  "doda": {
-    "fecha_emision": "YYYY-MM-DD",
-    "seccion_aduanera": "string"
-  },
-  "manifest": {
-    "placa_tracto": "string",
-    "placa_remolque": "string",
-    "nombre_operador": "string",
-    "aduana_arribo": "string",
-    "numero_entry": "string",
-    "broker": "string",
-    "descripcion_mercancia": "string",
-    "cantidad": number,
-    "peso_monto": number
-  },
-  "prefile": {
-    "numero_entry": "string",
-    "broker": "string",
-    "descripcion_mercancia": "string",
-    "cantidad": number,
-    "peso_monto": number
-  },
-  "tractor_plate": {
-    "plate_number": "string",
-    "confidence": number
-  },
-  "trailer_plate": {
-    "plate_number": "string",
-    "confidence": number
-  }
-}
+    Args:
+        images_bytes: Optimized JPEG bytes keyed 'doda', 'manifest', 'prefile',
+                      'tractor' and 'trailer'
 
-Reglas:
-- Si no encuentras algún dato: usa "NO_ENCONTRADO" para strings, 0 para números, 0.5 para confidence
-- Para placas no legibles: usa "NO_LEGIBLE" y confidence < 0.5
-- Responde ÚNICAMENTE con el objeto JSON completo"""
+    Returns:
+        AllExtractedData object with all extracted data
 
-    try:
-        logger.info("Calling OpenAI API with all 5 images (unified call)...")
-
-        # Single API call with ALL 5 images
-        response = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        # Text prompt
-                        {"type": "text", "text": unified_prompt},
-                        # All 5 images with "high" detail for accurate text extraction
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{images_b64['doda']}",
-                                "detail": "high"
-                            }
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{images_b64['manifest']}",
-                                "detail": "high"
-                            }
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{images_b64['prefile']}",
-                                "detail": "high"
-                            }
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{images_b64['tractor']}",
-                                "detail": "high"
-                            }
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{images_b64['trailer']}",
-                                "detail": "high"
-                            }
-                        }
-                    ]
-                }
-            ],
-            max_tokens=800,  # Slightly higher for unified response
-            temperature=0.1,
-            response_format={"type": "json_object"}
-        )
+    Raises:
+        Exception: If extraction fails
+    """
+    logger.info("=" * 70)
+    if UNIFIED_SINGLE_CALL:
+        logger.info("UNIFIED EXTRACTION: Processing all 5 images in a single API call")
+    else:
+        logger.info("UNIFIED EXTRACTION: Processing all 5 images in concurrent API calls")
+    logger.info("=" * 70)
 
-        # Extract and parse response
-        response_text = response.choices[0].message.content
-        logger.info("✓ Received unified response from OpenAI")
-
-        # Parse JSON
-        data = extract_json_from_response(response_text)
-        logger.info(f"✓ Successfully parsed unified JSON response")
-
-        # Convert to Pydantic models
-        extracted_data = AllExtractedData(
-            doda=ExtractedDODAData(**data['doda']),
-            manifest=ExtractedManifestData(**data['manifest']),
-            prefile=ExtractedPrefileData(**data['prefile']),
-            tractor_plate=ExtractedPlateData(**data['tractor_plate']),
-            trailer_plate=ExtractedPlateData(**data['trailer_plate'])
-        )
+    try:
+        if UNIFIED_SINGLE_CALL:
+            key = cache_key(*images_bytes.values(), _prompt_digest(_UNIFIED_PROMPT), OPENAI_MODEL)
+            data = get_cached(key)
+
+            if data is None:
+                data = await _call_unified_api(images_bytes, _UNIFIED_PROMPT)
+                set_cached(key, data)
+
+            # Convert to Pydantic models
+            extracted_data = AllExtractedData(
+                doda=build_extracted_model(ExtractedDODAData, data['doda']),
+                manifest=build_extracted_model(ExtractedManifestData, data['manifest']),
+                prefile=build_extracted_model(ExtractedPrefileData, data['prefile']),
+                tractor_plate=build_extracted_model(ExtractedPlateData, data['tractor_plate']),
+                trailer_plate=build_extracted_model(ExtractedPlateData, data['trailer_plate'])
+            )
+        else:
+            # Per-document prompts; each call is cached on its own image hash
+            extracted_data = await extract_all_documents(images_bytes)
 
         logger.info("=" * 70)
         logger.info("✓ UNIFIED EXTRACTION COMPLETE - All data extracted successfully")
@@ -550,5 +924,24 @@ Reglas:
         return extracted_data
 
     except Exception as e:
-        logger.error(f"Unified extraction failed: {e}", exc_info=True)
+        logger.error("Unified extraction failed: %s", e, exc_info=True)
         raise Exception(f"Failed to extract data from all documents: {str(e)}")
+
+
+def extract_all_documents_sync(
+    doda_path: str,
+    manifest_path: str,
+    prefile_path: str,
+    tractor_plate_path: str,
+    trailer_plate_path: str
+) -> AllExtractedData:
+    """
+    Blocking wrapper around extract_all_documents_unified for scripts and
+    other callers that are not running an event loop
+
+    Returns:
+        AllExtractedData object with all extracted data
+    """
+    return asyncio.run(extract_all_documents_unified(
+        doda_path, manifest_path, prefile_path, tractor_plate_path, trailer_plate_path
+    ))
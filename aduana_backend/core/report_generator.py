@@ -4,9 +4,10 @@ Generates detailed extraction and validation reports for the modal UI
 """
 
 import logging
-from typing import List
+from typing import Any, List, Optional, Tuple
 from datetime import datetime
 
+from core.ocr_cache import cache_key, get_cached, set_cached
 from models.schemas import (
     FieldExtractionStatus,
     DocumentExtractionReport,
@@ -19,6 +20,78 @@ from models.schemas import (
 
 logger = logging.getLogger(__name__)
 
+# Versión de la lógica de reportes: incrementar al cambiar generate_field_status
+# o FIELD_SPECS para invalidar los reportes guardados en caché
+REPORT_LOGIC_VERSION = 1
+
+
+# Campos de cada documento: (nombre técnico, etiqueta)
+FIELD_SPECS = {
+    "DODA": [
+        ("fecha_emision", "Fecha de Emisión"),
+        ("seccion_aduanera", "Sección Aduanera"),
+    ],
+    "E-Manifest": [
+        ("placa_tracto", "Placa Tracto"),
+        ("placa_remolque", "Placa Remolque"),
+        ("nombre_operador", "Nombre Operador"),
+        ("aduana_arribo", "Aduana de Arribo"),
+        ("numero_entry", "Número de Entry"),
+        ("broker", "Broker"),
+        ("descripcion_mercancia", "Descripción Mercancía"),
+        ("cantidad", "Cantidad"),
+        ("peso_monto", "Peso/Monto"),
+    ],
+    "Prefile": [
+        ("numero_entry", "Número de Entry"),
+        ("broker", "Broker"),
+        ("descripcion_mercancia", "Descripción Mercancía"),
+        ("cantidad", "Cantidad"),
+        ("peso_monto", "Peso/Monto"),
+    ],
+    "Placa": [
+        ("plate_number", "Número de Placa"),
+    ],
+}
+
+# Campos numéricos que deben ser > 0 para considerarse extraídos
+NUMERIC_REQUIRED = frozenset({"cantidad", "peso_monto"})
+# Valores que el modelo devuelve cuando no pudo leer un campo
+SENTINELS = frozenset({"NO_ENCONTRADO", "NO_LEGIBLE"})
+# Confianza por debajo de la cual un campo se marca como advertencia
+LOW_CONFIDENCE_THRESHOLD = 0.7
+
+STATUS_ICONS = {
+    "success": "✅",
+    "not_found": "❌",
+    "low_confidence": "⚠️",
+}
+
+
+def _status_str(field_name: str, value: str) -> str:
+    """Status de un campo de texto: no encontrado si es un valor centinela"""
+    return "not_found" if value in SENTINELS else "success"
+
+
+def _status_num(field_name: str, value: float) -> str:
+    """Status de un campo numérico: 0 solo cuenta como no encontrado en campos obligatorios"""
+    return "not_found" if value == 0 and field_name in NUMERIC_REQUIRED else "success"
+
+
+def _status_default(field_name: str, value: Any) -> str:
+    """Status de cualquier otro tipo de valor (fechas, etc.): siempre extraído"""
+    return "success"
+
+
+# Resolver de status por tipo exacto (lookup O(1) en lugar de la cadena de isinstance);
+# bool se mapea explícitamente porque type(True) no es int
+_STATUS_RESOLVERS = {
+    str: _status_str,
+    int: _status_num,
+    float: _status_num,
+    bool: _status_num,
+}
+
 
 def generate_field_status(
     field_name: str,
@@ -39,69 +112,65 @@ def generate_field_status(
         FieldExtractionStatus
     """
     # Determinar status basado en el valor
-    if isinstance(value, str):
-        if value == "NO_ENCONTRADO" or value == "NO_LEGIBLE":
-            status = "not_found"
-            icon = "❌"
-        else:
-            status = "success"
-            icon = "✅"
-    elif isinstance(value, (int, float)):
-        if value == 0 or value == 0.0:
-            # Verificar si es un campo que debería tener valor > 0
-            if field_name in ["cantidad", "peso_monto"]:
-                status = "not_found"
-                icon = "❌"
-            else:
-                status = "success"
-                icon = "✅"
-        else:
-            status = "success"
-            icon = "✅"
-    else:
-        status = "success"
-        icon = "✅"
+    status = _STATUS_RESOLVERS.get(type(value), _status_default)(field_name, value)
 
     # Advertencia si confidence es baja
-    if confidence and confidence < 0.7:
+    if confidence and confidence < LOW_CONFIDENCE_THRESHOLD:
         status = "low_confidence"
-        icon = "⚠️"
 
-    return FieldExtractionStatus(
+    return FieldExtractionStatus.model_construct(
         field_name=field_name,
         field_label=field_label,
         value=str(value),
         status=status,
-        icon=icon,
+        icon=STATUS_ICONS[status],
         confidence=confidence
     )
 
 
-def generate_doda_report(doda: ExtractedDODAData) -> DocumentExtractionReport:
-    """Genera reporte de extracción del DODA"""
+def build_document_report(
+    document_type: str,
+    document_name: str,
+    data: Any,
+    specs: List[Tuple[str, str]],
+    field_confidence: Optional[float] = None,
+    confidence_score: Optional[float] = None
+) -> DocumentExtractionReport:
+    """
+    Construye el reporte de un documento a partir de su tabla de campos,
+    contando extraídos / no encontrados en la misma pasada
 
-    fields = [
-        generate_field_status(
-            "fecha_emision",
-            "Fecha de Emisión",
-            doda.fecha_emision
-        ),
-        generate_field_status(
-            "seccion_aduanera",
-            "Sección Aduanera",
-            doda.seccion_aduanera
-        )
-    ]
+    Args:
+        document_type: Tipo de documento
+        document_name: Nombre legible del documento
+        data: Modelo con los datos extraídos
+        specs: Lista de (nombre técnico, etiqueta)
+        field_confidence: Confianza aplicada a cada campo (placas)
+        confidence_score: Confianza del documento; por defecto extraídos / total
+
+    Returns:
+        DocumentExtractionReport
+    """
+    fields = []
+    extracted = 0
+    not_found = 0
+
+    for field_name, field_label in specs:
+        field = generate_field_status(field_name, field_label, getattr(data, field_name), confidence=field_confidence)
+        fields.append(field)
+        if field.status == "success":
+            extracted += 1
+        elif field.status == "not_found":
+            not_found += 1
 
-    extracted = sum(1 for f in fields if f.status == "success")
-    not_found = sum(1 for f in fields if f.status == "not_found")
     total = len(fields)
 
-    confidence_score = extracted / total if total > 0 else 0.0
+    if confidence_score is None:
+        confidence_score = extracted / total if total > 0 else 0.0
 
-    return DocumentExtractionReport(
-        document_type="DODA",
-        document_name="DODA (Declaración de Operación)",
+    return DocumentExtractionReport.model_construct(
+        document_type=document_type,
+        document_name=document_name,
         total_fields=total,
         extracted_fields=extracted,
         not_found_fields=not_found,
@@ -110,64 +179,21 @@ def generate_doda_report(doda: ExtractedDODAData) -> DocumentExtractionReport:
     )
 
 
-def generate_manifest_report(manifest: ExtractedManifestData) -> DocumentExtractionReport:
-    """Genera reporte de extracción del E-Manifest"""
-
-    fields = [
-        generate_field_status("placa_tracto", "Placa Tracto", manifest.placa_tracto),
-        generate_field_status("placa_remolque", "Placa Remolque", manifest.placa_remolque),
-        generate_field_status("nombre_operador", "Nombre Operador", manifest.nombre_operador),
-        generate_field_status("aduana_arribo", "Aduana de Arribo", manifest.aduana_arribo),
-        generate_field_status("numero_entry", "Número de Entry", manifest.numero_entry),
-        generate_field_status("broker", "Broker", manifest.broker),
-        generate_field_status("descripcion_mercancia", "Descripción Mercancía", manifest.descripcion_mercancia),
-        generate_field_status("cantidad", "Cantidad", manifest.cantidad),
-        generate_field_status("peso_monto", "Peso/Monto", manifest.peso_monto),
-    ]
-
-    extracted = sum(1 for f in fields if f.status == "success")
-    not_found = sum(1 for f in fields if f.status == "not_found")
-    total = len(fields)
+def generate_doda_report(doda: ExtractedDODAData) -> DocumentExtractionReport:
+    """Genera reporte de extracción del DODA"""
+    return build_document_report("DODA", "DODA (Declaración de Operación)", doda, FIELD_SPECS["DODA"])
 
-    confidence_score = extracted / total if total > 0 else 0.0
 
-    return DocumentExtractionReport(
-        document_type="E-Manifest",
-        document_name="E-Manifest (Manifiesto Electrónico)",
-        total_fields=total,
-        extracted_fields=extracted,
-        not_found_fields=not_found,
-        confidence_score=confidence_score,
-        fields=fields
+def generate_manifest_report(manifest: ExtractedManifestData) -> DocumentExtractionReport:
+    """Genera reporte de extracción del E-Manifest"""
+    return build_document_report(
+        "E-Manifest", "E-Manifest (Manifiesto Electrónico)", manifest, FIELD_SPECS["E-Manifest"]
     )
 
 
 def generate_prefile_report(prefile: ExtractedPrefileData) -> DocumentExtractionReport:
     """Genera reporte de extracción del Prefile"""
-
-    fields = [
-        generate_field_status("numero_entry", "Número de Entry", prefile.numero_entry),
-        generate_field_status("broker", "Broker", prefile.broker),
-        generate_field_status("descripcion_mercancia", "Descripción Mercancía", prefile.descripcion_mercancia),
-        generate_field_status("cantidad", "Cantidad", prefile.cantidad),
-        generate_field_status("peso_monto", "Peso/Monto", prefile.peso_monto),
-    ]
-
-    extracted = sum(1 for f in fields if f.status == "success")
-    not_found = sum(1 for f in fields if f.status == "not_found")
-    total = len(fields)
-
-    confidence_score = extracted / total if total > 0 else 0.0
-
-    return DocumentExtractionReport(
-        document_type="Prefile",
-        document_name="Prefile (Pre-declaración)",
-        total_fields=total,
-        extracted_fields=extracted,
-        not_found_fields=not_found,
-        confidence_score=confidence_score,
-        fields=fields
-    )
+    return build_document_report("Prefile", "Prefile (Pre-declaración)", prefile, FIELD_SPECS["Prefile"])
 
 
 def generate_plate_report(
@@ -175,30 +201,13 @@ def generate_plate_report(
     plate_type: str
 ) -> DocumentExtractionReport:
     """Genera reporte de extracción de placa"""
-
-    fields = [
-        generate_field_status(
-            "plate_number",
-            "Número de Placa",
-            plate.plate_number,
-            confidence=plate.confidence
-        )
-    ]
-
-    extracted = sum(1 for f in fields if f.status == "success")
-    not_found = sum(1 for f in fields if f.status == "not_found")
-    total = len(fields)
-
-    confidence_score = plate.confidence if plate.confidence else 0.0
-
-    return DocumentExtractionReport(
-        document_type=f"Placa_{plate_type}",
-        document_name=f"Placa de {plate_type.capitalize()}",
-        total_fields=total,
-        extracted_fields=extracted,
-        not_found_fields=not_found,
-        confidence_score=confidence_score,
-        fields=fields
+    return build_document_report(
+        f"Placa_{plate_type}",
+        f"Placa de {plate_type.capitalize()}",
+        plate,
+        FIELD_SPECS["Placa"],
+        field_confidence=plate.confidence,
+        confidence_score=plate.confidence if plate.confidence else 0.0
     )
 
 
@@ -216,6 +225,12 @@ def generate_all_extraction_reports(
     """
     logger.info("Generando reportes de extracción para modal...")
 
+    # Los reportes son deterministas a partir de los datos extraídos
+    key = cache_key("extraction_reports", str(REPORT_LOGIC_VERSION), extracted_data.model_dump_json())
+    cached = get_cached(key)
+    if cached is not None:
+        return [DocumentExtractionReport.model_validate(report) for report in cached]
+
     reports = [
         generate_doda_report(extracted_data.doda),
         generate_manifest_report(extracted_data.manifest),
@@ -226,6 +241,8 @@ def generate_all_extraction_reports(
 
     logger.info(f"✓ Generados {len(reports)} reportes de extracción")
 
+    set_cached(key, [report.model_dump() for report in reports])
+
     return reports
 
 
@@ -0,0 +1,65 @@
+"""
+Request Limiter
+Gates the OpenAI calls of all in-flight trips behind bounded concurrency and
+a token-bucket rate limit, so bursts of concurrent trips do not run into 429s
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+
+class TokenBucket:
+    """Token-bucket rate limiter: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AsyncRequestLimiter:
+    """
+    Concurrency + rate gate for async calls
+
+    Each call starts as soon as a semaphore slot (and, when configured, a
+    rate-limit token) is free. It runs in the caller's own task, so errors
+    and cancellation reach the caller directly.
+    """
+
+    def __init__(self, max_concurrency: int = 5, requests_per_minute: Optional[int] = None):
+        self.loop = asyncio.get_running_loop()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._bucket = TokenBucket(requests_per_minute / 60, max_concurrency) if requests_per_minute else None
+
+    async def run(self, fn: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        """
+        Run fn(*args) once a slot is free
+
+        Args:
+            fn: Coroutine function performing the call
+            args: Positional arguments for fn
+
+        Returns:
+            Whatever fn returns (exceptions propagate to the caller)
+        """
+        async with self._semaphore:
+            if self._bucket is not None:
+                await self._bucket.acquire()
+            return await fn(*args)
@@ -5,17 +5,52 @@ Falls back to Vision API if Tesseract fails
 """
 
 import os
+import asyncio
+import functools
 import logging
-from typing import Dict, Any, Optional
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+import httpx
+import orjson
 from openai import OpenAI
 from dotenv import load_dotenv
+from PIL import Image
+
+from core.ocr_cache import cache_key, get_cached, set_cached
+from core.ocr_extractor import (
+    HTTP_LIMITS,
+    HTTP_TIMEOUT,
+    JSON_OBJECT_FORMAT,
+    get_openai_client as get_async_openai_client,
+    schema_response_format,
+    strict_json_schema
+)
+from models.schemas import (
+    ExtractedDODAData,
+    ExtractedManifestData,
+    ExtractedPrefileData,
+    ExtractedPlateData
+)
+
+# One OpenMP thread per Tesseract call, so several images can be OCR'd in parallel
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+try:
+    from tesserocr import PyTessBaseAPI, PSM
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
 
 try:
     import pytesseract
-    from PIL import Image
-    TESSERACT_AVAILABLE = True
+    PYTESSERACT_AVAILABLE = True
 except ImportError:
-    TESSERACT_AVAILABLE = False
+    PYTESSERACT_AVAILABLE = False
+
+TESSERACT_AVAILABLE = TESSEROCR_AVAILABLE or PYTESSERACT_AVAILABLE
+if not TESSERACT_AVAILABLE:
     logging.warning("pytesseract not available. Install with: pip install pytesseract")
 
 # Load environment variables
@@ -28,12 +63,149 @@ logger = logging.getLogger(__name__)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
+# Tesseract configuration
+TESSERACT_LANG = "spa+eng"  # Spanish + English languages
+OCR_MAX_SIDE = 2400  # ~300 DPI for a letter-size scan; larger only slows Tesseract down
+OCR_BINARIZE_THRESHOLD = 180  # Gray levels above this become white
+
+# Lookup table for Image.point (a list is applied in C, a lambda per gray level is not)
+_BINARIZE_LUT = [255 if level > OCR_BINARIZE_THRESHOLD else 0 for level in range(256)]
+
+# Worker processes for OCR'ing several images in parallel with tesserocr
+# (OMP_THREAD_LIMIT=1 makes each engine single-threaded, so fan out per process)
+OCR_MAX_WORKERS = min(4, os.cpu_count() or 1)
 
+# In-process Tesseract engine (tesserocr): language data is loaded once and
+# reused; the API object is not thread-safe, so calls are serialised
+_TESS_API = None
+_OCR_POOL: Optional[ProcessPoolExecutor] = None
+_TESS_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
 def get_openai_client() -> OpenAI:
-    """Initialize and return OpenAI client"""
+    """Return the shared OpenAI client (created once, keeps its connection pool warm)"""
     if not OPENAI_API_KEY:
         raise ValueError("OPENAI_API_KEY not found in environment variables")
-    return OpenAI(api_key=OPENAI_API_KEY)
+    http_client = httpx.Client(
+        http2=True,
+        timeout=httpx.Timeout(HTTP_TIMEOUT),
+        limits=HTTP_LIMITS
+    )
+    return OpenAI(api_key=OPENAI_API_KEY, http_client=http_client)
+
+
+def _get_tess_api():
+    """Return the shared tesserocr engine, creating it on first use (call with _TESS_LOCK held)"""
+    global _TESS_API
+
+    if _TESS_API is None:
+        # PSM.SINGLE_BLOCK == --psm 6: assume a single uniform block of text
+        _TESS_API = PyTessBaseAPI(lang=TESSERACT_LANG, psm=PSM.SINGLE_BLOCK)
+
+    return _TESS_API
+
+
+def preprocess_for_ocr(image_path: str) -> Image.Image:
+    """
+    Load an image as a downscaled 1-bit black/white page for Tesseract
+
+    Tesseract's runtime grows with pixel count and it reads clean binarized
+    text better than colour photos, so this cuts OCR time without hurting
+    accuracy on document scans.
+
+    Args:
+        image_path: Path to the image file
+
+    Returns:
+        Preprocessed PIL image (mode '1')
+    """
+    with Image.open(image_path) as image:
+        # Decode straight to grayscale at reduced size when the format allows it
+        image.draft('L', (OCR_MAX_SIDE, OCR_MAX_SIDE))
+        gray = image.convert('L')
+
+    if max(gray.size) > OCR_MAX_SIDE:
+        gray.thumbnail((OCR_MAX_SIDE, OCR_MAX_SIDE), Image.LANCZOS)
+
+    return gray.point(_BINARIZE_LUT, mode='1')
+
+
+def _ocr_with_tesserocr(image_path: str) -> str:
+    image = preprocess_for_ocr(image_path)
+    with _TESS_LOCK:
+        api = _get_tess_api()
+        api.SetImage(image)
+        return api.GetUTF8Text()
+
+
+def _init_tess_worker() -> None:
+    """Pool initializer: load the Tesseract language data once per worker"""
+    with _TESS_LOCK:
+        _get_tess_api()
+
+
+def _get_ocr_pool() -> ProcessPoolExecutor:
+    """
+    Return the shared OCR worker pool, creating it on first use
+
+    Returns:
+        ProcessPoolExecutor whose workers each hold their own tesserocr engine
+    """
+    global _OCR_POOL
+
+    if _OCR_POOL is None:
+        _OCR_POOL = ProcessPoolExecutor(max_workers=OCR_MAX_WORKERS, initializer=_init_tess_worker)
+
+    return _OCR_POOL
+
+
+def shutdown_ocr_pool() -> None:
+    """
+    Stop the shared OCR worker processes
+    """
+    global _OCR_POOL
+
+    if _OCR_POOL is not None:
+        _OCR_POOL.shutdown(wait=False, cancel_futures=True)
+        _OCR_POOL = None
+
+
+def extract_texts_parallel(image_paths: List[str]) -> List[str]:
+    """
+    OCR several images concurrently on the persistent tesserocr worker pool
+
+    Args:
+        image_paths: Paths to the image files
+
+    Returns:
+        Extracted text per image, in input order (empty strings on failure)
+    """
+    try:
+        logger.info(f"Extracting text with Tesseract from {len(image_paths)} images ({OCR_MAX_WORKERS} workers)")
+        # Per-image failures come back as "" from extract_text_with_tesseract
+        texts = list(_get_ocr_pool().map(extract_text_with_tesseract, image_paths))
+        logger.info(f"✓ Tesseract extracted {sum(len(text) for text in texts)} characters")
+        return texts
+
+    except Exception as e:
+        # The pool itself broke (e.g. a worker crashed): drop it and run in-process
+        logger.error(f"Parallel Tesseract extraction failed, retrying in-process: {e}")
+        shutdown_ocr_pool()
+        return [extract_text_with_tesseract(image_path) for image_path in image_paths]
+
+
+def _ocr_with_pytesseract(image_path: str) -> str:
+    # Open image (grayscale, downscaled, binarized)
+    image = preprocess_for_ocr(image_path)
+
+    # Tesseract configuration for better accuracy
+    # --psm 6: Assume a single uniform block of text
+    # -l spa+eng: Spanish + English languages
+    config = f'--psm 6 -l {TESSERACT_LANG}'
+
+    # Extract text (spawns a tesseract process per call)
+    return pytesseract.image_to_string(image, config=config)
 
 
 def extract_text_with_tesseract(image_path: str) -> str:
@@ -54,16 +226,11 @@ def extract_text_with_tesseract(image_path: str) -> str:
     try:
         logger.info(f"Extracting text with Tesseract from: {image_path}")
 
-        # Open image
-        image = Image.open(image_path)
-
-        # Tesseract configuration for better accuracy
-        # --psm 6: Assume a single uniform block of text
-        # -l spa+eng: Spanish + English languages
-        config = '--psm 6 -l spa+eng'
-
-        # Extract text
-        text = pytesseract.image_to_string(image, config=config)
+        # Prefer the in-process engine: no fork/exec or language reload per call
+        if TESSEROCR_AVAILABLE:
+            text = _ocr_with_tesserocr(image_path)
+        else:
+            text = _ocr_with_pytesseract(image_path)
 
         # Clean whitespace
         text = text.strip()
@@ -81,6 +248,127 @@ def extract_text_with_tesseract(image_path: str) -> str:
         return ""
 
 
+def extract_texts_with_tesseract(image_paths: List[str]) -> List[str]:
+    """
+    Extract raw text from several images with ONE Tesseract invocation
+    Tesseract reads a .txt file listing image paths and separates each
+    image's output with a form feed, so the process and language data are
+    loaded once instead of once per image
+
+    Args:
+        image_paths: Paths to the image files
+
+    Returns:
+        Extracted text per image, in input order (empty strings on failure)
+    """
+    if not TESSERACT_AVAILABLE:
+        logger.warning("Tesseract not available, skipping OCR")
+        return [""] * len(image_paths)
+
+    if len(image_paths) < 2:
+        return [extract_text_with_tesseract(image_path) for image_path in image_paths]
+
+    # The in-process engine has no start-up cost to batch away; spread it over cores instead
+    if TESSEROCR_AVAILABLE:
+        return extract_texts_parallel(image_paths)
+
+    list_file = None
+    try:
+        logger.info(f"Extracting text with Tesseract from {len(image_paths)} images (single run)")
+
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as list_file:
+            list_file.write("\n".join(os.path.abspath(image_path) for image_path in image_paths) + "\n")
+
+        output = pytesseract.image_to_string(list_file.name, config=f'--psm 6 -l {TESSERACT_LANG}')
+        pages = output.split("\x0c")
+
+        if len(pages) < len(image_paths):
+            raise ValueError(f"expected {len(image_paths)} pages, got {len(pages)}")
+
+        texts = [page.strip() for page in pages[:len(image_paths)]]
+        logger.info(f"✓ Tesseract extracted {sum(len(text) for text in texts)} characters")
+
+        return texts
+
+    except Exception as e:
+        logger.error(f"Tesseract batch extraction failed, retrying per image: {e}")
+        return [extract_text_with_tesseract(image_path) for image_path in image_paths]
+
+    finally:
+        if list_file is not None:
+            os.unlink(list_file.name)
+
+
+# Known document types are answered under a strict JSON Schema (Structured
+# Outputs) with a completion budget sized to their fields; anything else
+# falls back to json_object with the schema spelled out in the prompt
+_STRUCTURING_MODELS = {
+    "DODA": ExtractedDODAData,
+    "MANIFEST": ExtractedManifestData,
+    "PREFILE": ExtractedPrefileData,
+    "PLATE": ExtractedPlateData
+}
+_STRUCTURING_MAX_TOKENS = {"DODA": 60, "MANIFEST": 250, "PREFILE": 150, "PLATE": 30}
+DEFAULT_STRUCTURING_MAX_TOKENS = 300
+
+
+@functools.lru_cache(maxsize=32)
+def _structuring_prompt(document_type: str, fields_schema: Optional[str]) -> str:
+    """Build the static instructions for one document type (the cacheable prompt prefix)"""
+    prompt = f"Extrae y estructura los datos del texto OCR de un documento {document_type} que te enviará el usuario.\n\n"
+    if fields_schema is not None:
+        prompt += f"Responde EXACTAMENTE con este formato JSON:\n{fields_schema}\n\n"
+    prompt += 'Si no encuentras algún dato en el texto, usa "NO_ENCONTRADO" para strings o 0 para números.'
+    if fields_schema is not None:
+        prompt += "\nResponde SOLO con el JSON, sin texto adicional."
+    return prompt
+
+
+_STRUCTURING_FORMATS = {
+    doc_type: schema_response_format(model_cls.__name__, strict_json_schema(model_cls))
+    for doc_type, model_cls in _STRUCTURING_MODELS.items()
+}
+
+# Ready-made system prompts for the known types, built once at import
+_STRUCTURING_PROMPTS = {doc_type: _structuring_prompt(doc_type, None) for doc_type in _STRUCTURING_MODELS}
+
+
+def _structuring_request(raw_text: str, document_type: str, fields_schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the chat completion arguments for text structuring
+
+    Fixed instructions go first as the system message so the prefix is
+    byte-identical across calls and eligible for OpenAI prompt caching;
+    the OCR text is the tail.
+    """
+    doc_key = document_type.upper()
+    response_format = _STRUCTURING_FORMATS.get(doc_key)
+    # The schema only needs spelling out when the API is not enforcing it
+    system_prompt = _STRUCTURING_PROMPTS.get(doc_key) or _structuring_prompt(document_type, str(fields_schema))
+
+    return {
+        "model": OPENAI_MODEL,
+        "messages": [
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": "Texto OCR:\n" + raw_text
+            }
+        ],
+        "max_tokens": _STRUCTURING_MAX_TOKENS.get(doc_key, DEFAULT_STRUCTURING_MAX_TOKENS),
+        "temperature": 0.1,
+        "response_format": response_format or JSON_OBJECT_FORMAT
+    }
+
+
+def _structuring_cache_key(raw_text: str, document_type: str, fields_schema: Dict[str, Any]) -> str:
+    """Cache key for a structuring call (the prompt is fully determined by these + the model)"""
+    return cache_key("structure", document_type, str(fields_schema), OPENAI_MODEL, raw_text)
+
+
 def structure_text_with_gpt(
     raw_text: str,
     document_type: str,
@@ -98,42 +386,69 @@ def structure_text_with_gpt(
     Returns:
         Structured data as dictionary
     """
-    client = get_openai_client()
+    # Same OCR text + schema + model -> same answer; skip the API call on repeats
+    key = _structuring_cache_key(raw_text, document_type, fields_schema)
+    cached = get_cached(key)
+    if cached is not None:
+        return cached
 
-    # Create prompt for text-only structuring
-    prompt = f"""Extrae y estructura los siguientes datos del texto OCR de un documento {document_type}.
-
-Texto OCR:
-{raw_text}
-
-Responde EXACTAMENTE con este formato JSON:
-{fields_schema}
-
-Si no encuentras algún dato en el texto, usa "NO_ENCONTRADO" para strings o 0 para números.
-Responde SOLO con el JSON, sin texto adicional."""
+    client = get_openai_client()
 
     try:
         logger.info(f"Structuring {document_type} text with GPT (text-only mode)...")
 
         # Text-only API call (NO VISION)
         response = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            max_tokens=300,
-            temperature=0.1,
-            response_format={"type": "json_object"}
+            **_structuring_request(raw_text, document_type, fields_schema)
         )
 
         # Parse response
-        import json
-        result = json.loads(response.choices[0].message.content)
+        result = orjson.loads(response.choices[0].message.content)
+
+        logger.info(f"✓ Successfully structured {document_type} data with GPT text-only")
+        set_cached(key, result)
+
+        return result
+
+    except Exception as e:
+        logger.error(f"GPT text structuring failed: {e}")
+        raise
+
+
+async def structure_text_with_gpt_async(
+    raw_text: str,
+    document_type: str,
+    fields_schema: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Async version of structure_text_with_gpt, on the shared AsyncOpenAI client
+    so several documents can be structured concurrently
+
+    Args:
+        raw_text: Raw text extracted by Tesseract
+        document_type: Type of document (DODA, Manifest, Prefile, Plate)
+        fields_schema: Expected JSON schema
+
+    Returns:
+        Structured data as dictionary
+    """
+    key = _structuring_cache_key(raw_text, document_type, fields_schema)
+    cached = get_cached(key)
+    if cached is not None:
+        return cached
+
+    client = get_async_openai_client()
+
+    try:
+        logger.info(f"Structuring {document_type} text with GPT (text-only mode, async)...")
+
+        response = await client.chat.completions.create(
+            **_structuring_request(raw_text, document_type, fields_schema)
+        )
+        result = orjson.loads(response.choices[0].message.content)
 
         logger.info(f"✓ Successfully structured {document_type} data with GPT text-only")
+        set_cached(key, result)
 
         return result
 
@@ -175,6 +490,70 @@ def extract_data_hybrid(
     # Step 1: Try FREE Tesseract OCR
     raw_text = extract_text_with_tesseract(image_path)
 
+    return _structure_or_fallback(raw_text, image_path, document_type, fields_schema, vision_fallback_func)
+
+
+def extract_data_hybrid_batch(
+    documents: List[Tuple[str, str, Dict[str, Any]]],
+    vision_fallback_func: Optional[callable] = None
+) -> List[Dict[str, Any]]:
+    """
+    HYBRID APPROACH for several documents at once: all images are OCR'd by a
+    single Tesseract run, then each text is structured (or falls back) as in
+    extract_data_hybrid
+
+    Args:
+        documents: List of (image_path, document_type, fields_schema)
+        vision_fallback_func: Function to call if Tesseract fails for a document
+
+    Returns:
+        Extracted and structured data, one dict per document in input order
+    """
+    logger.info(f"HYBRID BATCH EXTRACTION: {len(documents)} documents")
+
+    raw_texts = extract_texts_with_tesseract([image_path for image_path, _, _ in documents])
+
+    return [
+        _structure_or_fallback(raw_text, image_path, document_type, fields_schema, vision_fallback_func)
+        for raw_text, (image_path, document_type, fields_schema) in zip(raw_texts, documents)
+    ]
+
+
+async def extract_data_hybrid_batch_async(
+    documents: List[Tuple[str, str, Dict[str, Any]]],
+    vision_fallback_func: Optional[callable] = None
+) -> List[Dict[str, Any]]:
+    """
+    Async version of extract_data_hybrid_batch: the single Tesseract run goes
+    to a worker thread, then all documents are structured concurrently, so
+    wall time is the slowest GPT call rather than the sum
+
+    Args:
+        documents: List of (image_path, document_type, fields_schema)
+        vision_fallback_func: Function (sync or async) to call if Tesseract fails for a document
+
+    Returns:
+        Extracted and structured data, one dict per document in input order
+    """
+    logger.info(f"HYBRID BATCH EXTRACTION (async): {len(documents)} documents")
+
+    raw_texts = await asyncio.to_thread(
+        extract_texts_with_tesseract, [image_path for image_path, _, _ in documents]
+    )
+
+    return list(await asyncio.gather(*[
+        _structure_or_fallback_async(raw_text, image_path, document_type, fields_schema, vision_fallback_func)
+        for raw_text, (image_path, document_type, fields_schema) in zip(raw_texts, documents)
+    ]))
+
+
+def _structure_or_fallback(
+    raw_text: str,
+    image_path: str,
+    document_type: str,
+    fields_schema: Dict[str, Any],
+    vision_fallback_func: Optional[callable]
+) -> Dict[str, Any]:
     # Step 2: If Tesseract succeeded, use cheap text-only GPT
     if raw_text and len(raw_text) > 50:  # Minimum text length threshold
         try:
@@ -195,6 +574,32 @@ def extract_data_hybrid(
         raise Exception(f"Tesseract extraction failed and no fallback provided for {document_type}")
 
 
+async def _structure_or_fallback_async(
+    raw_text: str,
+    image_path: str,
+    document_type: str,
+    fields_schema: Dict[str, Any],
+    vision_fallback_func: Optional[callable]
+) -> Dict[str, Any]:
+    if raw_text and len(raw_text) > 50:  # Minimum text length threshold
+        try:
+            logger.info(f"✓ Tesseract successful, using GPT text-only mode (COST SAVINGS: ~93%)")
+            return await structure_text_with_gpt_async(raw_text, document_type, fields_schema)
+
+        except Exception as e:
+            logger.warning(f"GPT text structuring failed: {e}")
+
+    logger.warning(f"Tesseract failed or insufficient text, falling back to Vision API")
+
+    if vision_fallback_func:
+        logger.info("Using Vision API fallback...")
+        if asyncio.iscoroutinefunction(vision_fallback_func):
+            return await vision_fallback_func(image_path)
+        return await asyncio.to_thread(vision_fallback_func, image_path)
+    else:
+        raise Exception(f"Tesseract extraction failed and no fallback provided for {document_type}")
+
+
 # Example usage schemas for each document type
 
 DODA_SCHEMA = """{
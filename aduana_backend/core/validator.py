@@ -4,8 +4,10 @@ Implements the 5 business validation rules (R1-R5) for document consistency
 """
 
 import logging
-from datetime import datetime, timedelta
-from typing import List, Optional
+import unicodedata
+from functools import lru_cache
+from datetime import date, datetime
+from typing import Any, Callable, List, Optional, Tuple
 
 from models.schemas import (
     ValidationError,
@@ -19,24 +21,43 @@ logger = logging.getLogger(__name__)
 # Validation thresholds
 DODA_MAX_AGE_DAYS = 3
 
+# Rules logic version: bump when a rule (or its enhanced report), its
+# thresholds/messages or the extraction prompts change, so cached validation
+# responses from the old logic are not served
+RULES_LOGIC_VERSION = 1
 
+# Log banners for validate_all_rules (built once, not per run)
+_RULE_SEPARATOR = "=" * 70
+_START_BANNER = f"{_RULE_SEPARATOR}\nSTARTING VALIDATION - EXECUTING ALL 5 RULES\n{_RULE_SEPARATOR}"
+
+# Combining diacritical marks (U+0300-U+036F) as a str.translate deletion table
+_COMBINING_MARKS = dict.fromkeys(c for c in range(0x300, 0x370) if unicodedata.combining(chr(c)))
+
+# Every byte except ASCII 0-9, as a bytes.translate deletion table
+_NON_DIGIT_BYTES = bytes(c for c in range(256) if not 0x30 <= c <= 0x39)
+
+# ASCII punctuation/whitespace dropped from plates ("ABC-123", "abc 123" -> "ABC123")
+_PLATE_STRIP = str.maketrans('', '', ''.join(chr(c) for c in range(128) if not chr(c).isalnum()))
+
+
+@lru_cache(maxsize=4096)
 def normalize_string(text: str) -> str:
     """
     Normalize string for comparison (lowercase, remove extra spaces, accents)
 
+    Cached, since the same manifest/prefile/plate strings are compared by
+    several rules.
+
     Args:
         text: String to normalize
 
     Returns:
         Normalized string
     """
-    import unicodedata
-
-    # Remove accents
-    text = ''.join(
-        c for c in unicodedata.normalize('NFD', text)
-        if unicodedata.category(c) != 'Mn'
-    )
+    # Remove accents (quick check skips the decomposition for plain ASCII OCR output)
+    if not unicodedata.is_normalized('NFKD', text):
+        text = unicodedata.normalize('NFKD', text)
+    text = text.translate(_COMBINING_MARKS)
 
     # Lowercase and remove extra spaces
     return ' '.join(text.lower().split())
@@ -54,6 +75,10 @@ def strings_match(str1: str, str2: str, threshold: float = 0.9) -> bool:
     Returns:
         True if strings are similar enough
     """
+    # Identical input needs no normalization
+    if str1 == str2:
+        return True
+
     # Exact match after normalization
     norm1 = normalize_string(str1)
     norm2 = normalize_string(str2)
@@ -65,28 +90,51 @@ def strings_match(str1: str, str2: str, threshold: float = 0.9) -> bool:
     if norm1 in norm2 or norm2 in norm1:
         return True
 
-    # Simple similarity: count matching words
+    # Simple similarity: count matching words (Jaccard). Whole words only, so
+    # one differing surname or digit is not partial credit
     words1 = set(norm1.split())
     words2 = set(norm2.split())
 
     if not words1 or not words2:
         return False
 
-    intersection = words1 & words2
-    union = words1 | words2
+    # Jaccard in one pass: probe the smaller set, derive the union size
+    if len(words1) > len(words2):
+        words1, words2 = words2, words1
+    intersection = sum(1 for word in words1 if word in words2)
+    union = len(words1) + len(words2) - intersection
 
-    similarity = len(intersection) / len(union)
+    similarity = intersection / union
 
     return similarity >= threshold
 
 
-def validate_r1_doda_vigencia(extracted_data: AllExtractedData) -> Optional[ValidationError]:
+@lru_cache(maxsize=4096)
+def normalize_plate(plate: str) -> str:
+    """Canonical uppercase alphanumeric form of a plate or entry number (cached for batch validation)"""
+    return plate.upper().translate(_PLATE_STRIP)
+
+
+def entries_match(entry1: str, entry2: str) -> bool:
+    """
+    Entry Numbers are identifiers, not text: only their canonical form must be
+    equal ("231-2712401-9" == "231 2712401 9"), never a fuzzy score, since
+    one digit off is a different entry
+    """
+    return normalize_plate(entry1) == normalize_plate(entry2)
+
+
+def validate_r1_doda_vigencia(
+    extracted_data: AllExtractedData,
+    today: Optional[date] = None
+) -> Optional[ValidationError]:
     """
     R1: Vigencia del DODA
     Verifica que la Fecha de Emisión del DODA no tenga más de 3 días de antigüedad
 
     Args:
         extracted_data: All extracted data from documents
+        today: Reference date (defaults to the current date)
 
     Returns:
         ValidationError if validation fails, None if passes
@@ -98,18 +146,21 @@ def validate_r1_doda_vigencia(extracted_data: AllExtractedData) -> Optional[Vali
 
         # Check for missing data
         if fecha_emision_str == "NO_ENCONTRADO" or not fecha_emision_str:
-            return ValidationError(
+            return ValidationError.model_construct(
                 rule_id="R1",
                 rule_name="Vigencia del DODA",
                 message="No se pudo extraer la fecha de emisión del DODA",
                 severity="error"
             )
 
-        # Parse date
+        # Parse date (C fast path for YYYY-MM-DD, strptime for unpadded variants like 2025-1-5)
         try:
-            fecha_emision = datetime.strptime(fecha_emision_str, "%Y-%m-%d")
+            try:
+                fecha_emision = date.fromisoformat(fecha_emision_str)
+            except ValueError:
+                fecha_emision = datetime.strptime(fecha_emision_str, "%Y-%m-%d").date()
         except ValueError:
-            return ValidationError(
+            return ValidationError.model_construct(
                 rule_id="R1",
                 rule_name="Vigencia del DODA",
                 message=f"Formato de fecha inválido en DODA: {fecha_emision_str}",
@@ -117,14 +168,14 @@ def validate_r1_doda_vigencia(extracted_data: AllExtractedData) -> Optional[Vali
             )
 
         # Calculate age
-        hoy = datetime.now()
+        hoy = today or date.today()
         edad_dias = (hoy - fecha_emision).days
 
-        logger.info(f"DODA emission date: {fecha_emision_str}, Age: {edad_dias} days")
+        logger.info("DODA emission date: %s, Age: %d days", fecha_emision_str, edad_dias)
 
         # Validate age
         if edad_dias > DODA_MAX_AGE_DAYS:
-            return ValidationError(
+            return ValidationError.model_construct(
                 rule_id="R1",
                 rule_name="Vigencia del DODA",
                 message=f"El DODA tiene {edad_dias} días de antigüedad (máximo permitido: {DODA_MAX_AGE_DAYS} días). Fecha de emisión: {fecha_emision_str}",
@@ -132,7 +183,7 @@ def validate_r1_doda_vigencia(extracted_data: AllExtractedData) -> Optional[Vali
             )
 
         if edad_dias < 0:
-            return ValidationError(
+            return ValidationError.model_construct(
                 rule_id="R1",
                 rule_name="Vigencia del DODA",
                 message=f"La fecha de emisión del DODA es futura: {fecha_emision_str}",
@@ -143,8 +194,8 @@ def validate_r1_doda_vigencia(extracted_data: AllExtractedData) -> Optional[Vali
         return None
 
     except Exception as e:
-        logger.error(f"Error in R1 validation: {e}", exc_info=True)
-        return ValidationError(
+        logger.error("Error in R1 validation: %s", e, exc_info=True)
+        return ValidationError.model_construct(
             rule_id="R1",
             rule_name="Vigencia del DODA",
             message=f"Error al validar vigencia del DODA: {str(e)}",
@@ -173,26 +224,26 @@ def validate_r2_placas(extracted_data: AllExtractedData) -> List[ValidationError
         placa_manifest_tracto = extracted_data.manifest.placa_tracto
         placa_foto_tracto = extracted_data.tractor_plate.plate_number
 
-        logger.info(f"Tractor plate - Manifest: '{placa_manifest_tracto}', Photo: '{placa_foto_tracto}'")
+        logger.info("Tractor plate - Manifest: '%s', Photo: '%s'", placa_manifest_tracto, placa_foto_tracto)
 
         # Check for missing data
         if placa_manifest_tracto == "NO_ENCONTRADO" or not placa_manifest_tracto:
-            errors.append(ValidationError(
+            errors.append(ValidationError.model_construct(
                 rule_id="R2",
                 rule_name="Coincidencia de Placas - Tracto",
                 message="No se pudo extraer la placa del tracto del Manifiesto",
                 severity="error"
             ))
         elif placa_foto_tracto == "NO_LEGIBLE" or not placa_foto_tracto:
-            errors.append(ValidationError(
+            errors.append(ValidationError.model_construct(
                 rule_id="R2",
                 rule_name="Coincidencia de Placas - Tracto",
                 message="No se pudo leer la placa del tracto en la foto",
                 severity="error"
             ))
-        elif not strings_match(placa_manifest_tracto, placa_foto_tracto):
+        elif normalize_plate(placa_manifest_tracto) != normalize_plate(placa_foto_tracto):
             confidence = extracted_data.tractor_plate.confidence or 0.0
-            errors.append(ValidationError(
+            errors.append(ValidationError.model_construct(
                 rule_id="R2",
                 rule_name="Coincidencia de Placas - Tracto",
                 message=f"La placa del tracto no coincide. Manifiesto: '{placa_manifest_tracto}', Foto: '{placa_foto_tracto}' (confianza: {confidence:.0%})",
@@ -202,8 +253,8 @@ def validate_r2_placas(extracted_data: AllExtractedData) -> List[ValidationError
             logger.info("✓ Tractor plate matches")
 
     except Exception as e:
-        logger.error(f"Error validating tractor plate: {e}", exc_info=True)
-        errors.append(ValidationError(
+        logger.error("Error validating tractor plate: %s", e, exc_info=True)
+        errors.append(ValidationError.model_construct(
             rule_id="R2",
             rule_name="Coincidencia de Placas - Tracto",
             message=f"Error al validar placa del tracto: {str(e)}",
@@ -215,26 +266,26 @@ def validate_r2_placas(extracted_data: AllExtractedData) -> List[ValidationError
         placa_manifest_remolque = extracted_data.manifest.placa_remolque
         placa_foto_remolque = extracted_data.trailer_plate.plate_number
 
-        logger.info(f"Trailer plate - Manifest: '{placa_manifest_remolque}', Photo: '{placa_foto_remolque}'")
+        logger.info("Trailer plate - Manifest: '%s', Photo: '%s'", placa_manifest_remolque, placa_foto_remolque)
 
         # Check for missing data
         if placa_manifest_remolque == "NO_ENCONTRADO" or not placa_manifest_remolque:
-            errors.append(ValidationError(
+            errors.append(ValidationError.model_construct(
                 rule_id="R2",
                 rule_name="Coincidencia de Placas - Remolque",
                 message="No se pudo extraer la placa del remolque del Manifiesto",
                 severity="error"
             ))
         elif placa_foto_remolque == "NO_LEGIBLE" or not placa_foto_remolque:
-            errors.append(ValidationError(
+            errors.append(ValidationError.model_construct(
                 rule_id="R2",
                 rule_name="Coincidencia de Placas - Remolque",
                 message="No se pudo leer la placa del remolque en la foto",
                 severity="error"
             ))
-        elif not strings_match(placa_manifest_remolque, placa_foto_remolque):
+        elif normalize_plate(placa_manifest_remolque) != normalize_plate(placa_foto_remolque):
             confidence = extracted_data.trailer_plate.confidence or 0.0
-            errors.append(ValidationError(
+            errors.append(ValidationError.model_construct(
                 rule_id="R2",
                 rule_name="Coincidencia de Placas - Remolque",
                 message=f"La placa del remolque no coincide. Manifiesto: '{placa_manifest_remolque}', Foto: '{placa_foto_remolque}' (confianza: {confidence:.0%})",
@@ -244,8 +295,8 @@ def validate_r2_placas(extracted_data: AllExtractedData) -> List[ValidationError
             logger.info("✓ Trailer plate matches")
 
     except Exception as e:
-        logger.error(f"Error validating trailer plate: {e}", exc_info=True)
-        errors.append(ValidationError(
+        logger.error("Error validating trailer plate: %s", e, exc_info=True)
+        errors.append(ValidationError.model_construct(
             rule_id="R2",
             rule_name="Coincidencia de Placas - Remolque",
             message=f"Error al validar placa del remolque: {str(e)}",
@@ -258,6 +309,60 @@ def validate_r2_placas(extracted_data: AllExtractedData) -> List[ValidationError
     return errors
 
 
+def _broker_from_entry(entry: str) -> str:
+    """
+    Extract the Broker code (first 3 digits) from an Entry Number
+
+    Entry format examples: "600258901", "231-2712401-9"
+    """
+    if entry == "NO_ENCONTRADO" or not entry:
+        return "NO_ENCONTRADO"
+    # Entry Numbers are ASCII; non-ASCII OCR noise is dropped before the C-level filter
+    digits = entry.encode('ascii', 'ignore').translate(None, _NON_DIGIT_BYTES).decode('ascii')
+    return digits[:3] if len(digits) >= 3 else "NO_ENCONTRADO"
+
+
+def _amounts_match(value1: float, value2: float) -> bool:
+    """Compare numeric fields with a small tolerance for floating point"""
+    return abs(value1 - value2) <= 0.01
+
+
+def _descriptions_match(str1: str, str2: str) -> bool:
+    """Descriptions are worded differently between documents, so use a looser threshold"""
+    return strings_match(str1, str2, threshold=0.7)
+
+
+@lru_cache(maxsize=2048)
+def _names_match(nombre_manifest: str, nombre_usuario: str) -> bool:
+    """
+    Driver names are compared with a more lenient threshold; the same driver
+    shows up trip after trip, so the fuzzy result is cached per name pair
+    """
+    return strings_match(nombre_manifest, nombre_usuario, threshold=0.7)
+
+
+# R3 sub-checks, in report order:
+# (nombre, campo, extractor, comparador, severidad si no coincide,
+#  "qué no se pudo extraer", "qué se validaba", mensaje de discrepancia)
+_R3_CHECKS = [
+    ("Número Entry", "numero_entry", None, entries_match, "error",
+     "el número de entry", "número de entry",
+     "El número de entry no coincide. Manifiesto: '{m}', Prefile: '{p}'"),
+    ("Broker", "numero_entry", _broker_from_entry, str.__eq__, "error",
+     "el código de broker del número de entry", "broker",
+     "El código de broker no coincide. Manifiesto: '{m}' (Entry: {m_raw}), Prefile: '{p}' (Entry: {p_raw})"),
+    ("Descripción", "descripcion_mercancia", None, _descriptions_match, "warning",
+     "la descripción de mercancía", "descripción de mercancía",
+     "La descripción de mercancía no coincide. Manifiesto: '{m}', Prefile: '{p}'"),
+    ("Cantidad", "cantidad", None, _amounts_match, "error",
+     "la cantidad", "cantidad",
+     "La cantidad no coincide. Manifiesto: {m}, Prefile: {p}"),
+    ("Peso/Monto", "peso_monto", None, _amounts_match, "error",
+     "el peso/monto", "peso/monto",
+     "El peso/monto no coincide. Manifiesto: {m}, Prefile: {p}"),
+]
+
+
 def validate_r3_cruce_manifest_prefile(extracted_data: AllExtractedData) -> List[ValidationError]:
     """
     R3: Cruce Manifest vs. Entry/Prefile
@@ -280,158 +385,41 @@ def validate_r3_cruce_manifest_prefile(extracted_data: AllExtractedData) -> List
     manifest = extracted_data.manifest
     prefile = extracted_data.prefile
 
-    # R3.1: Entry Number
-    try:
-        if manifest.numero_entry == "NO_ENCONTRADO" or prefile.numero_entry == "NO_ENCONTRADO":
-            errors.append(ValidationError(
-                rule_id="R3",
-                rule_name="Cruce Manifest/Prefile - Número Entry",
-                message="No se pudo extraer el número de entry de uno o ambos documentos",
-                severity="error"
-            ))
-        elif not strings_match(manifest.numero_entry, prefile.numero_entry):
-            errors.append(ValidationError(
-                rule_id="R3",
-                rule_name="Cruce Manifest/Prefile - Número Entry",
-                message=f"El número de entry no coincide. Manifiesto: '{manifest.numero_entry}', Prefile: '{prefile.numero_entry}'",
-                severity="error"
-            ))
-        else:
-            logger.info(f"✓ Entry number matches: {manifest.numero_entry}")
-    except Exception as e:
-        logger.error(f"Error validating entry number: {e}")
-        errors.append(ValidationError(
-            rule_id="R3",
-            rule_name="Cruce Manifest/Prefile - Número Entry",
-            message=f"Error al validar número de entry: {str(e)}",
-            severity="error"
-        ))
-
-    # R3.2: Broker (primeros 3 dígitos del Entry Number)
-    try:
-        # Extract broker from Entry Number (first 3 digits)
-        # Entry format examples: "600258901", "231-2712401-9"
-        def extract_broker_from_entry(entry: str) -> str:
-            """Extract first 3 digits from Entry Number as Broker code"""
-            if entry == "NO_ENCONTRADO" or not entry:
-                return "NO_ENCONTRADO"
-            # Remove all non-numeric characters
-            digits = ''.join(c for c in entry if c.isdigit())
-            # Return first 3 digits
-            if len(digits) >= 3:
-                return digits[:3]
-            return "NO_ENCONTRADO"
-
-        broker_manifest = extract_broker_from_entry(manifest.numero_entry)
-        broker_prefile = extract_broker_from_entry(prefile.numero_entry)
-
-        logger.info(f"Broker codes - Manifest: '{broker_manifest}' (from {manifest.numero_entry}), Prefile: '{broker_prefile}' (from {prefile.numero_entry})")
-
-        if broker_manifest == "NO_ENCONTRADO" or broker_prefile == "NO_ENCONTRADO":
-            errors.append(ValidationError(
-                rule_id="R3",
-                rule_name="Cruce Manifest/Prefile - Broker",
-                message="No se pudo extraer el código de broker del número de entry de uno o ambos documentos",
-                severity="error"
-            ))
-        elif broker_manifest != broker_prefile:
-            errors.append(ValidationError(
-                rule_id="R3",
-                rule_name="Cruce Manifest/Prefile - Broker",
-                message=f"El código de broker no coincide. Manifiesto: '{broker_manifest}' (Entry: {manifest.numero_entry}), Prefile: '{broker_prefile}' (Entry: {prefile.numero_entry})",
-                severity="error"
-            ))
-        else:
-            logger.info(f"✓ Broker code matches: {broker_manifest}")
-    except Exception as e:
-        logger.error(f"Error validating broker: {e}")
-        errors.append(ValidationError(
-            rule_id="R3",
-            rule_name="Cruce Manifest/Prefile - Broker",
-            message=f"Error al validar broker: {str(e)}",
-            severity="error"
-        ))
-
-    # R3.3: Merchandise Description
-    try:
-        if manifest.descripcion_mercancia == "NO_ENCONTRADO" or prefile.descripcion_mercancia == "NO_ENCONTRADO":
-            errors.append(ValidationError(
-                rule_id="R3",
-                rule_name="Cruce Manifest/Prefile - Descripción",
-                message="No se pudo extraer la descripción de mercancía de uno o ambos documentos",
-                severity="error"
-            ))
-        elif not strings_match(manifest.descripcion_mercancia, prefile.descripcion_mercancia, threshold=0.7):
-            errors.append(ValidationError(
-                rule_id="R3",
-                rule_name="Cruce Manifest/Prefile - Descripción",
-                message=f"La descripción de mercancía no coincide. Manifiesto: '{manifest.descripcion_mercancia}', Prefile: '{prefile.descripcion_mercancia}'",
-                severity="warning"  # Warning because descriptions might vary
-            ))
-        else:
-            logger.info(f"✓ Merchandise description matches")
-    except Exception as e:
-        logger.error(f"Error validating merchandise description: {e}")
-        errors.append(ValidationError(
-            rule_id="R3",
-            rule_name="Cruce Manifest/Prefile - Descripción",
-            message=f"Error al validar descripción de mercancía: {str(e)}",
-            severity="error"
-        ))
-
-    # R3.4: Quantity
-    try:
-        if manifest.cantidad == 0 or prefile.cantidad == 0:
-            errors.append(ValidationError(
-                rule_id="R3",
-                rule_name="Cruce Manifest/Prefile - Cantidad",
-                message="No se pudo extraer la cantidad de uno o ambos documentos",
-                severity="error"
-            ))
-        elif abs(manifest.cantidad - prefile.cantidad) > 0.01:  # Small tolerance for floating point
-            errors.append(ValidationError(
-                rule_id="R3",
-                rule_name="Cruce Manifest/Prefile - Cantidad",
-                message=f"La cantidad no coincide. Manifiesto: {manifest.cantidad}, Prefile: {prefile.cantidad}",
-                severity="error"
-            ))
-        else:
-            logger.info(f"✓ Quantity matches: {manifest.cantidad}")
-    except Exception as e:
-        logger.error(f"Error validating quantity: {e}")
-        errors.append(ValidationError(
-            rule_id="R3",
-            rule_name="Cruce Manifest/Prefile - Cantidad",
-            message=f"Error al validar cantidad: {str(e)}",
-            severity="error"
-        ))
-
-    # R3.5: Weight/Amount
-    try:
-        if manifest.peso_monto == 0 or prefile.peso_monto == 0:
-            errors.append(ValidationError(
-                rule_id="R3",
-                rule_name="Cruce Manifest/Prefile - Peso/Monto",
-                message="No se pudo extraer el peso/monto de uno o ambos documentos",
-                severity="error"
-            ))
-        elif abs(manifest.peso_monto - prefile.peso_monto) > 0.01:
-            errors.append(ValidationError(
+    for name, field, extractor, matches, severity, missing_what, subject, mismatch_message in _R3_CHECKS:
+        rule_name = f"Cruce Manifest/Prefile - {name}"
+        try:
+            raw_manifest = getattr(manifest, field)
+            raw_prefile = getattr(prefile, field)
+            value_manifest = extractor(raw_manifest) if extractor else raw_manifest
+            value_prefile = extractor(raw_prefile) if extractor else raw_prefile
+
+            # Missing data: sentinel for text fields, 0 for numeric ones
+            if value_manifest in ("NO_ENCONTRADO", 0) or value_prefile in ("NO_ENCONTRADO", 0):
+                errors.append(ValidationError.model_construct(
+                    rule_id="R3",
+                    rule_name=rule_name,
+                    message=f"No se pudo extraer {missing_what} de uno o ambos documentos",
+                    severity="error"
+                ))
+            elif not matches(value_manifest, value_prefile):
+                errors.append(ValidationError.model_construct(
+                    rule_id="R3",
+                    rule_name=rule_name,
+                    message=mismatch_message.format(
+                        m=value_manifest, p=value_prefile, m_raw=raw_manifest, p_raw=raw_prefile
+                    ),
+                    severity=severity
+                ))
+            else:
+                logger.info("✓ R3 %s matches: %s", name, value_manifest)
+        except Exception as e:
+            logger.error("Error validating R3 %s: %s", name, e)
+            errors.append(ValidationError.model_construct(
                 rule_id="R3",
-                rule_name="Cruce Manifest/Prefile - Peso/Monto",
-                message=f"El peso/monto no coincide. Manifiesto: {manifest.peso_monto}, Prefile: {prefile.peso_monto}",
+                rule_name=rule_name,
+                message=f"Error al validar {subject}: {str(e)}",
                 severity="error"
             ))
-        else:
-            logger.info(f"✓ Weight/Amount matches: {manifest.peso_monto}")
-    except Exception as e:
-        logger.error(f"Error validating weight/amount: {e}")
-        errors.append(ValidationError(
-            rule_id="R3",
-            rule_name="Cruce Manifest/Prefile - Peso/Monto",
-            message=f"Error al validar peso/monto: {str(e)}",
-            severity="error"
-        ))
 
     if not errors:
         logger.info("✓ R3 validation passed")
@@ -456,11 +444,11 @@ def validate_r4_aduana(extracted_data: AllExtractedData) -> Optional[ValidationE
         seccion_aduanera = extracted_data.doda.seccion_aduanera
         aduana_arribo = extracted_data.manifest.aduana_arribo
 
-        logger.info(f"Customs - DODA: '{seccion_aduanera}', Manifest: '{aduana_arribo}'")
+        logger.info("Customs - DODA: '%s', Manifest: '%s'", seccion_aduanera, aduana_arribo)
 
         # Check for missing data
         if seccion_aduanera == "NO_ENCONTRADO" or not seccion_aduanera:
-            return ValidationError(
+            return ValidationError.model_construct(
                 rule_id="R4",
                 rule_name="Coincidencia de Aduana",
                 message="No se pudo extraer la sección aduanera del DODA",
@@ -468,7 +456,7 @@ def validate_r4_aduana(extracted_data: AllExtractedData) -> Optional[ValidationE
             )
 
         if aduana_arribo == "NO_ENCONTRADO" or not aduana_arribo:
-            return ValidationError(
+            return ValidationError.model_construct(
                 rule_id="R4",
                 rule_name="Coincidencia de Aduana",
                 message="No se pudo extraer la aduana de arribo del Manifiesto",
@@ -477,7 +465,7 @@ def validate_r4_aduana(extracted_data: AllExtractedData) -> Optional[ValidationE
 
         # Validate match
         if not strings_match(seccion_aduanera, aduana_arribo):
-            return ValidationError(
+            return ValidationError.model_construct(
                 rule_id="R4",
                 rule_name="Coincidencia de Aduana",
                 message=f"La aduana no coincide. DODA: '{seccion_aduanera}', Manifiesto: '{aduana_arribo}'",
@@ -488,8 +476,8 @@ def validate_r4_aduana(extracted_data: AllExtractedData) -> Optional[ValidationE
         return None
 
     except Exception as e:
-        logger.error(f"Error in R4 validation: {e}", exc_info=True)
-        return ValidationError(
+        logger.error("Error in R4 validation: %s", e, exc_info=True)
+        return ValidationError.model_construct(
             rule_id="R4",
             rule_name="Coincidencia de Aduana",
             message=f"Error al validar coincidencia de aduana: {str(e)}",
@@ -516,11 +504,11 @@ def validate_r5_operador(extracted_data: AllExtractedData, driver_name: str) ->
         nombre_manifest = extracted_data.manifest.nombre_operador
         nombre_usuario = driver_name
 
-        logger.info(f"Driver name - Manifest: '{nombre_manifest}', User input: '{nombre_usuario}'")
+        logger.info("Driver name - Manifest: '%s', User input: '%s'", nombre_manifest, nombre_usuario)
 
         # Check for missing data
         if nombre_manifest == "NO_ENCONTRADO" or not nombre_manifest:
-            return ValidationError(
+            return ValidationError.model_construct(
                 rule_id="R5",
                 rule_name="Coincidencia de Operador",
                 message="No se pudo extraer el nombre del operador del Manifiesto",
@@ -528,7 +516,7 @@ def validate_r5_operador(extracted_data: AllExtractedData, driver_name: str) ->
             )
 
         if not nombre_usuario or not nombre_usuario.strip():
-            return ValidationError(
+            return ValidationError.model_construct(
                 rule_id="R5",
                 rule_name="Coincidencia de Operador",
                 message="No se ingresó el nombre del operador en el formulario",
@@ -536,8 +524,8 @@ def validate_r5_operador(extracted_data: AllExtractedData, driver_name: str) ->
             )
 
         # Validate match (more lenient threshold for names)
-        if not strings_match(nombre_manifest, nombre_usuario, threshold=0.7):
-            return ValidationError(
+        if not _names_match(nombre_manifest, nombre_usuario):
+            return ValidationError.model_construct(
                 rule_id="R5",
                 rule_name="Coincidencia de Operador",
                 message=f"El nombre del operador no coincide. Manifiesto: '{nombre_manifest}', Formulario: '{nombre_usuario}'",
@@ -548,8 +536,8 @@ def validate_r5_operador(extracted_data: AllExtractedData, driver_name: str) ->
         return None
 
     except Exception as e:
-        logger.error(f"Error in R5 validation: {e}", exc_info=True)
-        return ValidationError(
+        logger.error("Error in R5 validation: %s", e, exc_info=True)
+        return ValidationError.model_construct(
             rule_id="R5",
             rule_name="Coincidencia de Operador",
             message=f"Error al validar coincidencia de operador: {str(e)}",
@@ -571,43 +559,38 @@ def validate_all_rules(
     Returns:
         List of all validation errors (empty if all validations pass)
     """
-    logger.info("=" * 70)
-    logger.info("STARTING VALIDATION - EXECUTING ALL 5 RULES")
-    logger.info("=" * 70)
-
+    logger.info(_START_BANNER)
+
+    # One reference date for the whole run
+    today = date.today()
+
+    # R1-R5 are independent, GIL-bound and take microseconds each: run them
+    # in order on this thread (a pool would only add dispatch overhead)
+    rule_calls: List[Tuple[Callable[..., Any], tuple]] = [
+        (validate_r1_doda_vigencia, (extracted_data, today)),                  # R1: DODA Vigencia
+        (validate_r2_placas, (extracted_data,)),                                # R2: Placas
+        (validate_r3_cruce_manifest_prefile, (extracted_data,)),                # R3: Cruce Manifest/Prefile
+        (validate_r4_aduana, (extracted_data,)),                                # R4: Aduana
+        (validate_r5_operador, (extracted_data, original_data.driverData.name)) # R5: Operador
+    ]
     all_errors = []
-
-    # R1: DODA Vigencia
-    error_r1 = validate_r1_doda_vigencia(extracted_data)
-    if error_r1:
-        all_errors.append(error_r1)
-
-    # R2: Placas
-    errors_r2 = validate_r2_placas(extracted_data)
-    all_errors.extend(errors_r2)
-
-    # R3: Cruce Manifest/Prefile
-    errors_r3 = validate_r3_cruce_manifest_prefile(extracted_data)
-    all_errors.extend(errors_r3)
-
-    # R4: Aduana
-    error_r4 = validate_r4_aduana(extracted_data)
-    if error_r4:
-        all_errors.append(error_r4)
-
-    # R5: Operador
-    error_r5 = validate_r5_operador(extracted_data, original_data.driverData.name)
-    if error_r5:
-        all_errors.append(error_r5)
+    for rule, args in rule_calls:
+        result = rule(*args)
+        # R2/R3 return a list of errors, the others a single error or None
+        if isinstance(result, list):
+            all_errors.extend(result)
+        elif result:
+            all_errors.append(result)
 
     # Summary
-    logger.info("=" * 70)
     if all_errors:
-        logger.warning(f"VALIDATION COMPLETED - {len(all_errors)} ERROR(S) FOUND")
-        for error in all_errors:
-            logger.warning(f"  [{error.rule_id}] {error.message}")
+        logger.warning(
+            "%s\nVALIDATION COMPLETED - %d ERROR(S) FOUND\n%s\n%s",
+            _RULE_SEPARATOR, len(all_errors),
+            "\n".join(f"  [{error.rule_id}] {error.message}" for error in all_errors),
+            _RULE_SEPARATOR
+        )
     else:
-        logger.info("VALIDATION COMPLETED - ALL RULES PASSED ✓")
-    logger.info("=" * 70)
+        logger.info("%s\nVALIDATION COMPLETED - ALL RULES PASSED ✓\n%s", _RULE_SEPARATOR, _RULE_SEPARATOR)
 
     return all_errors
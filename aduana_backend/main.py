@@ -3,33 +3,47 @@ Aduana Proyecto - Backend API
 FastAPI server for document validation at border crossings
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
+from collections import Counter
 import tempfile
-import shutil
+from datetime import date
 import logging
-from pathlib import Path
+from typing import Awaitable, Callable
 
 from models.schemas import (
     CapturedData,
+    DriverData,
     ValidationResponse,
     AllExtractedData,
     EnhancedValidationResponse,
     ValidationSummary
 )
-from core.image_optimizer import optimize_image, save_optimized_image
+from core.image_optimizer import (
+    LOW_DETAIL_MAX_SIDE,
+    optimize_image_files_batch_async,
+    optimize_images_batch_async,
+    save_optimized_images,
+    shutdown_process_pool
+)
+from core.ocr_cache import cache_key, get_cached, set_cached
 from core.ocr_extractor import (
-    extract_doda_data,
-    extract_manifest_data,
-    extract_prefile_data,
-    extract_plate_data,
-    extract_all_documents_unified  # OPTIMIZED: Unified extraction function
+    extract_all_documents_from_bytes,  # Extraction straight from the optimized bytes in memory
+    OPENAI_MODEL,
+    PLATE_IMAGE_DETAIL,
+    UNIFIED_SINGLE_CALL,
+    close_openai_client
 )
-from core.validator import validate_all_rules
+from core.validator import RULES_LOGIC_VERSION, validate_all_rules
 from core.validator_enhanced import validate_all_rules_enhanced
 from core.report_generator import (
+    REPORT_LOGIC_VERSION,
     generate_all_extraction_reports,
     calculate_overall_confidence
 )
@@ -41,11 +55,43 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Threads for file I/O and other asyncio.to_thread work
+DEFAULT_EXECUTOR_WORKERS = 8
+
+# Images never touch the disk on the request path; set DEBUG_DUMP_IMAGES=true
+# to also write each request's optimized JPEGs to a temp directory (kept for inspection)
+DEBUG_DUMP_IMAGES = os.getenv("DEBUG_DUMP_IMAGES", "false").lower() == "true"
+
+# Read once at startup: /health is polled by load balancers and should stay trivial
+OPENAI_CONFIGURED = bool(os.getenv("OPENAI_API_KEY"))
+BACKEND_PORT = os.getenv("BACKEND_PORT", "8000")
+
+# Plates go to the Vision API with detail="low" (512px): optimize them to that size
+PLATE_MAX_SIDES = (
+    {'tractor_plate': LOW_DETAIL_MAX_SIDE, 'trailer_plate': LOW_DETAIL_MAX_SIDE}
+    if PLATE_IMAGE_DETAIL == "low" else {}
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    App lifespan: bound the default thread pool used by asyncio.to_thread and
+    release the worker processes and pooled OpenAI HTTP connections on shutdown
+    """
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=DEFAULT_EXECUTOR_WORKERS))
+    yield
+    await close_openai_client()
+    shutdown_process_pool()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Aduana Proyecto API",
     description="API for validating border crossing documents",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # orjson renders the large nested enhanced responses several times faster
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -60,6 +106,68 @@ app.add_middleware(
 )
 
 
+def collect_images(data: CapturedData) -> dict:
+    """
+    Gather the 5 base64 images of a request keyed by image name
+    The names double as optimization stats keys
+    """
+    return {
+        'tractor_plate': data.driverData.tractorPlate,
+        'trailer_plate': data.driverData.trailerPlate,
+        'doda': data.documents.doda,
+        'emanifest': data.documents.emanifest,
+        'prefile': data.documents.prefile
+    }
+
+
+def extraction_images(optimized_images: dict) -> dict:
+    """
+    Map the optimized JPEG bytes to the keys the extractor expects, so they
+    go straight to the Vision API without a temp file round-trip
+    """
+    return {
+        'doda': optimized_images['doda'][0],
+        'manifest': optimized_images['emanifest'][0],
+        'prefile': optimized_images['prefile'][0],
+        'tractor': optimized_images['tractor_plate'][0],
+        'trailer': optimized_images['trailer_plate'][0]
+    }
+
+
+async def dump_images_for_debug(optimized_images: dict) -> None:
+    """
+    Write the optimized JPEGs of a request to a fresh temp directory
+    Debug aid only (DEBUG_DUMP_IMAGES); failures are logged, never raised
+    """
+    try:
+        directory = await asyncio.to_thread(tempfile.mkdtemp, prefix="aduana_")
+        await save_optimized_images(
+            {name: image_bytes for name, (image_bytes, _) in optimized_images.items()}, directory
+        )
+        logger.info(f"Optimized images dumped to {directory}")
+    except Exception as e:
+        logger.error(f"Error dumping optimized images: {e}")
+
+
+def response_cache_key(endpoint: str, optimized_images: dict, driver_name: str) -> str:
+    """
+    Key a validation response by endpoint, the 5 optimized images, the driver
+    name and the current day (R1 depends on today's date), so a retried or
+    re-scanned submission skips extraction and validation entirely. The
+    rules/report logic versions and the model are part of the key, so a
+    deploy that changes them never serves verdicts from the old logic
+    """
+    return cache_key(
+        endpoint,
+        str(RULES_LOGIC_VERSION),
+        str(REPORT_LOGIC_VERSION),
+        OPENAI_MODEL,
+        *(image_bytes for image_bytes, _ in optimized_images.values()),
+        driver_name,
+        date.today().isoformat()
+    )
+
+
 @app.get("/")
 async def root():
     """
@@ -80,11 +188,19 @@ async def health_check():
     """
     return {
         "status": "healthy",
-        "openai_configured": bool(os.getenv("OPENAI_API_KEY")),
-        "port": os.getenv("BACKEND_PORT", "8000")
+        "openai_configured": OPENAI_CONFIGURED,
+        "port": BACKEND_PORT
     }
 
 
+def dumped_response(content: dict, cache_status: str) -> ORJSONResponse:
+    """
+    Send an already-dumped response dict as-is: returning a Response makes
+    FastAPI skip re-validating and re-encoding it against response_model
+    """
+    return ORJSONResponse(content, headers={"X-Cache": cache_status})
+
+
 @app.post("/api/validate", response_model=ValidationResponse)
 async def validate_documents(data: CapturedData):
     """
@@ -97,73 +213,27 @@ async def validate_documents(data: CapturedData):
     Returns:
         ValidationResponse with success status and any validation errors
     """
-    temp_dir = None
-
     try:
         logger.info("=== Starting document validation ===")
 
-        # Create temporary directory for this request
-        temp_dir = tempfile.mkdtemp(prefix="aduana_")
-        logger.info(f"Created temporary directory: {temp_dir}")
-
         # Track optimization results
         optimization_stats = {}
 
-        # Optimize and save driver plate images
-        logger.info("Processing driver plate images...")
-
-        try:
-            tractor_bytes, tractor_info = optimize_image(data.driverData.tractorPlate)
-            tractor_path = os.path.join(temp_dir, "tractor_plate.jpg")
-            save_optimized_image(tractor_bytes, tractor_path)
-            optimization_stats['tractor_plate'] = tractor_info
-            logger.info(f"✓ Tractor plate optimized: {tractor_info['saved_percentage']}% reduction")
-        except Exception as e:
-            logger.error(f"Error processing tractor plate: {e}")
-            raise HTTPException(status_code=400, detail=f"Error procesando placa del tracto: {str(e)}")
-
-        try:
-            trailer_bytes, trailer_info = optimize_image(data.driverData.trailerPlate)
-            trailer_path = os.path.join(temp_dir, "trailer_plate.jpg")
-            save_optimized_image(trailer_bytes, trailer_path)
-            optimization_stats['trailer_plate'] = trailer_info
-            logger.info(f"✓ Trailer plate optimized: {trailer_info['saved_percentage']}% reduction")
-        except Exception as e:
-            logger.error(f"Error processing trailer plate: {e}")
-            raise HTTPException(status_code=400, detail=f"Error procesando placa del remolque: {str(e)}")
-
-        # Optimize and save document images
-        logger.info("Processing document images...")
+        # Optimize all 5 images (driver plates + documents) in parallel
+        logger.info("Processing driver plate and document images...")
 
         try:
-            doda_bytes, doda_info = optimize_image(data.documents.doda)
-            doda_path = os.path.join(temp_dir, "doda.jpg")
-            save_optimized_image(doda_bytes, doda_path)
-            optimization_stats['doda'] = doda_info
-            logger.info(f"✓ DODA optimized: {doda_info['saved_percentage']}% reduction")
+            optimized_images = await optimize_images_batch_async(collect_images(data), PLATE_MAX_SIDES)
         except Exception as e:
-            logger.error(f"Error processing DODA: {e}")
-            raise HTTPException(status_code=400, detail=f"Error procesando documento DODA: {str(e)}")
+            logger.error(f"Error processing images: {e}")
+            raise HTTPException(status_code=400, detail=f"Error procesando imágenes: {str(e)}")
 
-        try:
-            emanifest_bytes, emanifest_info = optimize_image(data.documents.emanifest)
-            emanifest_path = os.path.join(temp_dir, "emanifest.jpg")
-            save_optimized_image(emanifest_bytes, emanifest_path)
-            optimization_stats['emanifest'] = emanifest_info
-            logger.info(f"✓ E-Manifest optimized: {emanifest_info['saved_percentage']}% reduction")
-        except Exception as e:
-            logger.error(f"Error processing E-Manifest: {e}")
-            raise HTTPException(status_code=400, detail=f"Error procesando documento E-Manifest: {str(e)}")
+        if DEBUG_DUMP_IMAGES:
+            await dump_images_for_debug(optimized_images)
 
-        try:
-            prefile_bytes, prefile_info = optimize_image(data.documents.prefile)
-            prefile_path = os.path.join(temp_dir, "prefile.jpg")
-            save_optimized_image(prefile_bytes, prefile_path)
-            optimization_stats['prefile'] = prefile_info
-            logger.info(f"✓ Prefile optimized: {prefile_info['saved_percentage']}% reduction")
-        except Exception as e:
-            logger.error(f"Error processing Prefile: {e}")
-            raise HTTPException(status_code=400, detail=f"Error procesando documento Prefile: {str(e)}")
+        for name, (_, image_info) in optimized_images.items():
+            optimization_stats[name] = image_info
+            logger.debug("✓ %s optimized: %s%% reduction", name, image_info['saved_percentage'])
 
         # Calculate total statistics
         total_original = sum(stats['original_size'] for stats in optimization_stats.values())
@@ -177,31 +247,33 @@ async def validate_documents(data: CapturedData):
         logger.info(f"Optimized size: {total_optimized:,} bytes")
         logger.info(f"Saved: {total_saved:,} bytes ({total_saved_percentage:.1f}%)")
 
+        # Identical submission already validated today: return the stored response
+        response_key = response_cache_key("validate", optimized_images, data.driverData.name)
+        cached_response = get_cached(response_key)
+        if cached_response is not None:
+            logger.info("=== Returning cached validation response ===")
+            return dumped_response(cached_response, "HIT")
+
         # ============================================================
         # Phase 3: Extract data using OpenAI Vision API (OPTIMIZED)
         # ============================================================
-        logger.info("=== Starting AI Data Extraction (UNIFIED CALL) ===")
+        # OCR_UNIFIED_SINGLE_CALL picks one call for all 5 images; by default
+        # each document gets its own call, all 5 running concurrently
+        extraction_mode = "1 API call for all 5 images" if UNIFIED_SINGLE_CALL else "5 concurrent API calls"
+        logger.info(f"=== Starting AI Data Extraction ({extraction_mode}) ===")
 
         try:
-            # OPTIMIZED: Extract ALL documents in a SINGLE API call
-            # This reduces cost by ~80% and latency by ~75% compared to 5 separate calls
-            logger.info("Using unified extraction (1 API call for all 5 images)...")
-
-            extracted_data = extract_all_documents_unified(
-                doda_path=doda_path,
-                manifest_path=emanifest_path,
-                prefile_path=prefile_path,
-                tractor_plate_path=tractor_path,
-                trailer_plate_path=trailer_path
-            )
-
-            logger.info("=== AI Data Extraction Complete (OPTIMIZED) ===")
-            logger.info(f"✓ All 5 documents extracted successfully in 1 API call")
-            logger.info(f"✓ DODA: {extracted_data.doda.model_dump()}")
-            logger.info(f"✓ Manifest: {extracted_data.manifest.model_dump()}")
-            logger.info(f"✓ Prefile: {extracted_data.prefile.model_dump()}")
-            logger.info(f"✓ Tractor plate: {extracted_data.tractor_plate.model_dump()}")
-            logger.info(f"✓ Trailer plate: {extracted_data.trailer_plate.model_dump()}")
+            extracted_data = await extract_all_documents_from_bytes(extraction_images(optimized_images))
+
+            logger.info("=== AI Data Extraction Complete ===")
+            logger.info(f"✓ All 5 documents extracted successfully ({extraction_mode})")
+            # Full field dumps only at DEBUG: model_dump() is not free on every request
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("✓ DODA: %s", extracted_data.doda.model_dump())
+                logger.debug("✓ Manifest: %s", extracted_data.manifest.model_dump())
+                logger.debug("✓ Prefile: %s", extracted_data.prefile.model_dump())
+                logger.debug("✓ Tractor plate: %s", extracted_data.tractor_plate.model_dump())
+                logger.debug("✓ Trailer plate: %s", extracted_data.trailer_plate.model_dump())
 
         except Exception as e:
             logger.error(f"Error during AI data extraction: {e}", exc_info=True)
@@ -222,8 +294,9 @@ async def validate_documents(data: CapturedData):
             # Build response
             if validation_errors:
                 # Validation failed - return errors
-                error_count = len([e for e in validation_errors if e.severity == "error"])
-                warning_count = len([e for e in validation_errors if e.severity == "warning"])
+                severity_counts = Counter(e.severity for e in validation_errors)
+                error_count = severity_counts["error"]
+                warning_count = severity_counts["warning"]
 
                 if error_count > 0:
                     message = f"Se encontraron {error_count} error(es) de validación"
@@ -232,7 +305,7 @@ async def validate_documents(data: CapturedData):
                 else:
                     message = f"Se encontraron {warning_count} advertencia(s)"
 
-                response = ValidationResponse(
+                response = ValidationResponse.model_construct(
                     success=False,
                     message=message,
                     errors=validation_errors
@@ -242,7 +315,7 @@ async def validate_documents(data: CapturedData):
 
             else:
                 # All validations passed
-                response = ValidationResponse(
+                response = ValidationResponse.model_construct(
                     success=True,
                     message=f"✓ Todos los documentos son válidos y consistentes. Conductor: {data.driverData.name}",
                     errors=[]
@@ -259,7 +332,9 @@ async def validate_documents(data: CapturedData):
 
         logger.info("=== Processing complete ===")
 
-        return response
+        content = response.model_dump(mode="json", exclude_none=True)
+        set_cached(response_key, content)
+        return dumped_response(content, "MISS")
 
     except HTTPException:
         # Re-raise HTTP exceptions
@@ -272,17 +347,8 @@ async def validate_documents(data: CapturedData):
             detail=f"Error interno del servidor: {str(e)}"
         )
 
-    finally:
-        # Clean up temporary directory
-        if temp_dir and os.path.exists(temp_dir):
-            try:
-                shutil.rmtree(temp_dir)
-                logger.info(f"Cleaned up temporary directory: {temp_dir}")
-            except Exception as e:
-                logger.error(f"Error cleaning up temp directory: {e}")
-
 
-@app.post("/api/validate-enhanced", response_model=EnhancedValidationResponse)
+@app.post("/api/validate-enhanced", response_model=EnhancedValidationResponse, response_model_exclude_none=True)
 async def validate_documents_enhanced(data: CapturedData):
     """
     Enhanced validation endpoint with detailed reporting for modal UI
@@ -294,57 +360,102 @@ async def validate_documents_enhanced(data: CapturedData):
     Returns:
         EnhancedValidationResponse with detailed extraction and validation info
     """
-    import time
-    from datetime import datetime, timezone
+    return await run_enhanced_validation(
+        data,
+        lambda: optimize_images_batch_async(collect_images(data), PLATE_MAX_SIDES)
+    )
 
-    start_time = time.time()
-    temp_dir = None
 
-    try:
-        logger.info("=== Starting ENHANCED document validation ===")
+@app.post("/api/validate-enhanced/multipart", response_model=EnhancedValidationResponse, response_model_exclude_none=True)
+async def validate_documents_enhanced_multipart(
+    name: str = Form(..., description="Driver's full name"),
+    tractorPlate: UploadFile = File(..., description="Tractor plate photo"),
+    trailerPlate: UploadFile = File(..., description="Trailer plate photo"),
+    doda: UploadFile = File(..., description="DODA document image"),
+    emanifest: UploadFile = File(..., description="E-Manifest document image"),
+    prefile: UploadFile = File(..., description="Prefile document image")
+):
+    """
+    Same as /api/validate-enhanced, with the 5 images sent as multipart files
+    instead of base64 data URLs in JSON: ~25% fewer bytes on the wire and no
+    base64 string to buffer and decode on the server
+
+    Returns:
+        EnhancedValidationResponse with detailed extraction and validation info
+    """
+    name = name.strip()
+    if not name:
+        raise HTTPException(status_code=422, detail="Driver name cannot be empty")
+
+    uploads = {
+        'tractor_plate': tractorPlate,
+        'trailer_plate': trailerPlate,
+        'doda': doda,
+        'emanifest': emanifest,
+        'prefile': prefile
+    }
 
-        # Create temporary directory for this request
-        temp_dir = tempfile.mkdtemp(prefix="aduana_")
-        logger.info(f"Created temporary directory: {temp_dir}")
+    async def optimize() -> dict:
+        contents = await asyncio.gather(*(upload.read() for upload in uploads.values()))
+        return await optimize_image_files_batch_async(dict(zip(uploads, contents)), PLATE_MAX_SIDES)
 
-        # Optimize and save driver plate images
-        logger.info("Processing driver plate images...")
+    # The rules only read the driver name: the images never enter CapturedData
+    data = CapturedData.model_construct(driverData=DriverData.model_construct(name=name))
+    return await run_enhanced_validation(data, optimize)
 
-        tractor_bytes, _ = optimize_image(data.driverData.tractorPlate)
-        tractor_path = os.path.join(temp_dir, "tractor_plate.jpg")
-        save_optimized_image(tractor_bytes, tractor_path)
 
-        trailer_bytes, _ = optimize_image(data.driverData.trailerPlate)
-        trailer_path = os.path.join(temp_dir, "trailer_plate.jpg")
-        save_optimized_image(trailer_bytes, trailer_path)
+async def run_enhanced_validation(
+    data: CapturedData,
+    optimize: Callable[[], Awaitable[dict]]
+) -> ORJSONResponse:
+    """
+    Shared body of the enhanced endpoints: optimize, extract, validate, report
 
-        # Optimize and save document images
-        logger.info("Processing document images...")
+    Args:
+        data: Captured data (only driverData.name is read)
+        optimize: Coroutine factory returning the optimized images keyed like collect_images()
 
-        doda_bytes, _ = optimize_image(data.documents.doda)
-        doda_path = os.path.join(temp_dir, "doda.jpg")
-        save_optimized_image(doda_bytes, doda_path)
+    Returns:
+        Serialized EnhancedValidationResponse (fresh or cached) with its X-Cache header
+    """
+    import time
+    from datetime import datetime, timezone
 
-        emanifest_bytes, _ = optimize_image(data.documents.emanifest)
-        emanifest_path = os.path.join(temp_dir, "emanifest.jpg")
-        save_optimized_image(emanifest_bytes, emanifest_path)
+    start_time = time.time()
 
-        prefile_bytes, _ = optimize_image(data.documents.prefile)
-        prefile_path = os.path.join(temp_dir, "prefile.jpg")
-        save_optimized_image(prefile_bytes, prefile_path)
+    try:
+        logger.info("=== Starting ENHANCED document validation ===")
+
+        # Optimize all 5 images in parallel
+        logger.info("Processing driver plate and document images...")
+
+        try:
+            optimized_images = await optimize()
+        except Exception as e:
+            logger.error(f"Error processing images: {e}")
+            raise HTTPException(status_code=400, detail=f"Error procesando imágenes: {str(e)}")
+
+        if DEBUG_DUMP_IMAGES:
+            await dump_images_for_debug(optimized_images)
 
         logger.info("✓ All 5 images optimized successfully")
 
+        # Identical submission already validated today: reuse the stored
+        # response, refreshing only the per-request timing fields
+        response_key = response_cache_key("validate-enhanced", optimized_images, data.driverData.name)
+        cached_response = get_cached(response_key)
+        if cached_response is not None:
+            logger.info("=== Returning cached ENHANCED validation response ===")
+            return dumped_response({
+                **cached_response,
+                "summary": {**cached_response["summary"], "processing_time": round(time.time() - start_time, 2)},
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            }, "HIT")
+
         # Extract data using OpenAI Vision API
         logger.info("=== Starting AI Data Extraction ===")
 
-        extracted_data = extract_all_documents_unified(
-            doda_path=doda_path,
-            manifest_path=emanifest_path,
-            prefile_path=prefile_path,
-            tractor_plate_path=tractor_path,
-            trailer_plate_path=trailer_path
-        )
+        extracted_data = await extract_all_documents_from_bytes(extraction_images(optimized_images))
 
         logger.info("✓ AI Data Extraction Complete")
 
@@ -365,9 +476,10 @@ async def validate_documents_enhanced(data: CapturedData):
         processing_time = time.time() - start_time
 
         # Count passed/failed/warning rules
-        passed_count = sum(1 for r in rule_details if r.status == "passed")
-        failed_count = sum(1 for r in rule_details if r.status == "failed")
-        warning_count = sum(1 for r in rule_details if r.status == "warning")
+        status_counts = Counter(r.status for r in rule_details)
+        passed_count = status_counts["passed"]
+        failed_count = status_counts["failed"]
+        warning_count = status_counts["warning"]
 
         # Determine overall status
         if failed_count == 0 and warning_count == 0:
@@ -383,7 +495,7 @@ async def validate_documents_enhanced(data: CapturedData):
             all_errors.extend(rule.errors)
 
         # Build summary
-        summary = ValidationSummary(
+        summary = ValidationSummary.model_construct(
             total_rules=5,
             passed_rules=passed_count,
             failed_rules=failed_count,
@@ -407,7 +519,7 @@ async def validate_documents_enhanced(data: CapturedData):
             success = False
 
         # Build enhanced response
-        response = EnhancedValidationResponse(
+        response = EnhancedValidationResponse.model_construct(
             success=success,
             message=message,
             errors=all_errors,
@@ -421,7 +533,9 @@ async def validate_documents_enhanced(data: CapturedData):
         logger.info(f"Summary: {passed_count} passed, {failed_count} failed, {warning_count} warnings")
         logger.info(f"Processing time: {processing_time:.2f}s")
 
-        return response
+        content = response.model_dump(mode="json", exclude_none=True)
+        set_cached(response_key, content)
+        return dumped_response(content, "MISS")
 
     except HTTPException:
         raise
@@ -433,20 +547,11 @@ async def validate_documents_enhanced(data: CapturedData):
             detail=f"Error interno del servidor: {str(e)}"
         )
 
-    finally:
-        # Clean up temporary directory
-        if temp_dir and os.path.exists(temp_dir):
-            try:
-                shutil.rmtree(temp_dir)
-                logger.info(f"Cleaned up temporary directory: {temp_dir}")
-            except Exception as e:
-                logger.error(f"Error cleaning up temp directory: {e}")
-
 
 if __name__ == "__main__":
     import uvicorn
 
-    port = int(os.getenv("BACKEND_PORT", 8000))
+    port = int(BACKEND_PORT)
     host = os.getenv("BACKEND_HOST", "0.0.0.0")
 
     uvicorn.run(
@@ -2,9 +2,19 @@
 Pydantic schemas for request/response validation
 """
 
-from typing import Optional, Dict
-from pydantic import BaseModel, Field, validator
-import re
+from typing import Dict, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+# Every image arrives as a base64 data URL
+DATA_URL_PREFIX = 'data:image/'
+
+
+def _check_data_url(v: str, empty_message: str) -> str:
+    """Reject empty values and anything that is not an image data URL (prefix check only)"""
+    if v.startswith(DATA_URL_PREFIX):
+        return v
+    # Only failures need to tell an empty value apart from a wrong format
+    raise ValueError(empty_message if not v else 'Invalid image format. Must be a base64 data URL')
 
 
 class DriverData(BaseModel):
@@ -15,20 +25,18 @@ class DriverData(BaseModel):
     tractorPlate: str = Field(..., description="Base64 encoded image of tractor plate")
     trailerPlate: str = Field(..., description="Base64 encoded image of trailer plate")
 
-    @validator('name')
+    @field_validator('name')
+    @classmethod
     def validate_name(cls, v):
-        if not v or not v.strip():
+        name = v.strip()
+        if not name:
             raise ValueError('Driver name cannot be empty')
-        return v.strip()
+        return name
 
-    @validator('tractorPlate', 'trailerPlate')
+    @field_validator('tractorPlate', 'trailerPlate')
+    @classmethod
     def validate_base64_image(cls, v):
-        if not v:
-            raise ValueError('Image data cannot be empty')
-        # Check if it's a valid base64 image string
-        if not v.startswith('data:image/'):
-            raise ValueError('Invalid image format. Must be a base64 data URL')
-        return v
+        return _check_data_url(v, 'Image data cannot be empty')
 
 
 class Documents(BaseModel):
@@ -39,13 +47,10 @@ class Documents(BaseModel):
     emanifest: str = Field(..., description="Base64 encoded E-Manifest document image")
     prefile: str = Field(..., description="Base64 encoded Prefile document image")
 
-    @validator('doda', 'emanifest', 'prefile')
+    @field_validator('doda', 'emanifest', 'prefile')
+    @classmethod
     def validate_base64_image(cls, v):
-        if not v:
-            raise ValueError('Document image cannot be empty')
-        if not v.startswith('data:image/'):
-            raise ValueError('Invalid image format. Must be a base64 data URL')
-        return v
+        return _check_data_url(v, 'Document image cannot be empty')
 
 
 class CapturedData(BaseModel):
@@ -56,45 +61,33 @@ class CapturedData(BaseModel):
     driverData: DriverData = Field(..., description="Driver information and plate photos")
     documents: Documents = Field(..., description="All required document images")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "driverData": {
-                    "name": "Juan Pérez",
-                    "tractorPlate": "data:image/png;base64,iVBORw0KG...",
-                    "trailerPlate": "data:image/png;base64,iVBORw0KG..."
-                },
-                "documents": {
-                    "doda": "data:image/jpeg;base64,/9j/4AAQ...",
-                    "emanifest": "data:image/jpeg;base64,/9j/4AAQ...",
-                    "prefile": "data:image/jpeg;base64,/9j/4AAQ..."
-                }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "driverData": {
+                "name": "Juan Pérez",
+                "tractorPlate": "data:image/png;base64,iVBORw0KG...",
+                "trailerPlate": "data:image/png;base64,iVBORw0KG..."
+            },
+            "documents": {
+                "doda": "data:image/jpeg;base64,/9j/4AAQ...",
+                "emanifest": "data:image/jpeg;base64,/9j/4AAQ...",
+                "prefile": "data:image/jpeg;base64,/9j/4AAQ..."
             }
         }
+    })
 
 
 class ValidationError(BaseModel):
     """
     Individual validation error for a specific rule
     """
-    rule_id: str = Field(..., description="Rule identifier (R1, R2, R3, R4, R5)")
+    # Literal types are checked inside pydantic-core, no Python validator call
+    rule_id: Literal['R1', 'R2', 'R3', 'R4', 'R5'] = Field(..., description="Rule identifier (R1, R2, R3, R4, R5)")
     rule_name: str = Field(..., description="Human-readable rule name")
     message: str = Field(..., description="Error message describing the issue")
-    severity: str = Field(..., description="Error severity: 'error' or 'warning'")
-
-    @validator('rule_id')
-    def validate_rule_id(cls, v):
-        valid_rules = ['R1', 'R2', 'R3', 'R4', 'R5']
-        if v not in valid_rules:
-            raise ValueError(f'Invalid rule_id. Must be one of: {valid_rules}')
-        return v
+    severity: Literal['error', 'warning'] = Field(..., description="Error severity: 'error' or 'warning'")
 
-    @validator('severity')
-    def validate_severity(cls, v):
-        valid_severities = ['error', 'warning']
-        if v not in valid_severities:
-            raise ValueError(f'Invalid severity. Must be one of: {valid_severities}')
-        return v
+    model_config = ConfigDict(extra='forbid', frozen=True)
 
 
 class ValidationResponse(BaseModel):
@@ -105,21 +98,20 @@ class ValidationResponse(BaseModel):
     message: str = Field(..., description="Summary message")
     errors: list[ValidationError] = Field(default_factory=list, description="List of validation errors")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "success": False,
-                "message": "Se encontraron 2 errores de validación",
-                "errors": [
-                    {
-                        "rule_id": "R1",
-                        "rule_name": "Vigencia del DODA",
-                        "message": "El DODA tiene más de 3 días de antigüedad",
-                        "severity": "error"
-                    }
-                ]
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "success": False,
+            "message": "Se encontraron 2 errores de validación",
+            "errors": [
+                {
+                    "rule_id": "R1",
+                    "rule_name": "Vigencia del DODA",
+                    "message": "El DODA tiene más de 3 días de antigüedad",
+                    "severity": "error"
+                }
+            ]
         }
+    })
 
 
 class ImageOptimizationResult(BaseModel):
@@ -144,65 +136,63 @@ class ExtractedDODAData(BaseModel):
     fecha_emision: str = Field(..., description="Emission date in YYYY-MM-DD format")
     seccion_aduanera: str = Field(..., description="Customs section")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "fecha_emision": "2025-10-20",
-                "seccion_aduanera": "Tijuana"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "fecha_emision": "2025-10-20",
+            "seccion_aduanera": "Tijuana"
         }
+    })
 
 
-class ExtractedManifestData(BaseModel):
+class _EntryFields(BaseModel):
     """
-    Data extracted from E-Manifest document via OCR/AI
+    Entry fields shared by the E-Manifest and the Prefile (cross-checked by R3)
     """
-    placa_tracto: str = Field(..., description="Tractor plate number")
-    placa_remolque: str = Field(..., description="Trailer plate number")
-    nombre_operador: str = Field(..., description="Driver/operator name")
-    aduana_arribo: str = Field(..., description="Arrival customs")
     numero_entry: str = Field(..., description="Entry number")
     broker: str = Field(..., description="Broker name")
     descripcion_mercancia: str = Field(..., description="Merchandise description")
     cantidad: float = Field(..., description="Quantity")
     peso_monto: float = Field(..., description="Weight or amount")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "placa_tracto": "ABC-123",
-                "placa_remolque": "XYZ-789",
-                "nombre_operador": "Juan Pérez García",
-                "aduana_arribo": "Tijuana",
-                "numero_entry": "ENT-2025-001234",
-                "broker": "Brokers Unidos S.A.",
-                "descripcion_mercancia": "Productos electrónicos",
-                "cantidad": 100,
-                "peso_monto": 5000.50
-            }
+
+class ExtractedManifestData(_EntryFields):
+    """
+    Data extracted from E-Manifest document via OCR/AI
+    """
+    placa_tracto: str = Field(..., description="Tractor plate number")
+    placa_remolque: str = Field(..., description="Trailer plate number")
+    nombre_operador: str = Field(..., description="Driver/operator name")
+    aduana_arribo: str = Field(..., description="Arrival customs")
+
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "placa_tracto": "ABC-123",
+            "placa_remolque": "XYZ-789",
+            "nombre_operador": "Juan Pérez García",
+            "aduana_arribo": "Tijuana",
+            "numero_entry": "ENT-2025-001234",
+            "broker": "Brokers Unidos S.A.",
+            "descripcion_mercancia": "Productos electrónicos",
+            "cantidad": 100,
+            "peso_monto": 5000.50
         }
+    })
 
 
-class ExtractedPrefileData(BaseModel):
+class ExtractedPrefileData(_EntryFields):
     """
     Data extracted from Prefile document via OCR/AI
     """
-    numero_entry: str = Field(..., description="Entry number")
-    broker: str = Field(..., description="Broker name")
-    descripcion_mercancia: str = Field(..., description="Merchandise description")
-    cantidad: float = Field(..., description="Quantity")
-    peso_monto: float = Field(..., description="Weight or amount")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "numero_entry": "ENT-2025-001234",
-                "broker": "Brokers Unidos S.A.",
-                "descripcion_mercancia": "Productos electrónicos",
-                "cantidad": 100,
-                "peso_monto": 5000.50
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "numero_entry": "ENT-2025-001234",
+            "broker": "Brokers Unidos S.A.",
+            "descripcion_mercancia": "Productos electrónicos",
+            "cantidad": 100,
+            "peso_monto": 5000.50
         }
+    })
 
 
 class ExtractedPlateData(BaseModel):
@@ -212,13 +202,12 @@ class ExtractedPlateData(BaseModel):
     plate_number: str = Field(..., description="License plate number")
     confidence: Optional[float] = Field(None, description="OCR confidence level (0-1)")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "plate_number": "ABC-123",
-                "confidence": 0.95
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "plate_number": "ABC-123",
+            "confidence": 0.95
         }
+    })
 
 
 class AllExtractedData(BaseModel):
@@ -228,44 +217,44 @@ class AllExtractedData(BaseModel):
     doda: ExtractedDODAData
     manifest: ExtractedManifestData
     prefile: ExtractedPrefileData
+    # Both plates share ExtractedPlateData (one schema, one prompt): keep it that way
     tractor_plate: ExtractedPlateData
     trailer_plate: ExtractedPlateData
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "doda": {
-                    "fecha_emision": "2025-10-20",
-                    "seccion_aduanera": "Tijuana"
-                },
-                "manifest": {
-                    "placa_tracto": "ABC-123",
-                    "placa_remolque": "XYZ-789",
-                    "nombre_operador": "Juan Pérez García",
-                    "aduana_arribo": "Tijuana",
-                    "numero_entry": "ENT-2025-001234",
-                    "broker": "Brokers Unidos S.A.",
-                    "descripcion_mercancia": "Productos electrónicos",
-                    "cantidad": 100,
-                    "peso_monto": 5000.50
-                },
-                "prefile": {
-                    "numero_entry": "ENT-2025-001234",
-                    "broker": "Brokers Unidos S.A.",
-                    "descripcion_mercancia": "Productos electrónicos",
-                    "cantidad": 100,
-                    "peso_monto": 5000.50
-                },
-                "tractor_plate": {
-                    "plate_number": "ABC-123",
-                    "confidence": 0.95
-                },
-                "trailer_plate": {
-                    "plate_number": "XYZ-789",
-                    "confidence": 0.93
-                }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "doda": {
+                "fecha_emision": "2025-10-20",
+                "seccion_aduanera": "Tijuana"
+            },
+            "manifest": {
+                "placa_tracto": "ABC-123",
+                "placa_remolque": "XYZ-789",
+                "nombre_operador": "Juan Pérez García",
+                "aduana_arribo": "Tijuana",
+                "numero_entry": "ENT-2025-001234",
+                "broker": "Brokers Unidos S.A.",
+                "descripcion_mercancia": "Productos electrónicos",
+                "cantidad": 100,
+                "peso_monto": 5000.50
+            },
+            "prefile": {
+                "numero_entry": "ENT-2025-001234",
+                "broker": "Brokers Unidos S.A.",
+                "descripcion_mercancia": "Productos electrónicos",
+                "cantidad": 100,
+                "peso_monto": 5000.50
+            },
+            "tractor_plate": {
+                "plate_number": "ABC-123",
+                "confidence": 0.95
+            },
+            "trailer_plate": {
+                "plate_number": "XYZ-789",
+                "confidence": 0.93
             }
         }
+    })
 
 
 # ============================================================================
@@ -276,22 +265,22 @@ class FieldExtractionStatus(BaseModel):
     """Estado de extracción de un campo individual"""
     field_name: str = Field(..., description="Nombre técnico del campo")
     field_label: str = Field(..., description="Etiqueta legible del campo")
-    value: str | float | int = Field(..., description="Valor extraído")
-    status: str = Field(..., description="success | not_found | low_confidence")
+    # report_generator always sends str; left_to_right stops at the first arm that matches
+    value: str | int | float = Field(..., union_mode='left_to_right', description="Valor extraído")
+    status: Literal['success', 'not_found', 'low_confidence'] = Field(..., description="Estado de extracción")
     icon: str = Field(..., description="✅ | ❌ | ⚠️")
     confidence: Optional[float] = Field(None, description="Nivel de confianza 0-1")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "field_name": "descripcion_mercancia",
-                "field_label": "Descripción de Mercancía",
-                "value": "Steel coils, hot rolled",
-                "status": "success",
-                "icon": "✅",
-                "confidence": 0.95
-            }
+    model_config = ConfigDict(extra='forbid', frozen=True, json_schema_extra={
+        "example": {
+            "field_name": "descripcion_mercancia",
+            "field_label": "Descripción de Mercancía",
+            "value": "Steel coils, hot rolled",
+            "status": "success",
+            "icon": "✅",
+            "confidence": 0.95
         }
+    })
 
 
 class DocumentExtractionReport(BaseModel):
@@ -304,18 +293,17 @@ class DocumentExtractionReport(BaseModel):
     confidence_score: float = Field(..., description="Confianza promedio 0-1")
     fields: list[FieldExtractionStatus] = Field(..., description="Detalle de cada campo")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "document_type": "manifest",
-                "document_name": "E-Manifest (Manifiesto Electrónico)",
-                "total_fields": 9,
-                "extracted_fields": 7,
-                "not_found_fields": 2,
-                "confidence_score": 0.78,
-                "fields": []
-            }
+    model_config = ConfigDict(extra='forbid', frozen=True, json_schema_extra={
+        "example": {
+            "document_type": "manifest",
+            "document_name": "E-Manifest (Manifiesto Electrónico)",
+            "total_fields": 9,
+            "extracted_fields": 7,
+            "not_found_fields": 2,
+            "confidence_score": 0.78,
+            "fields": []
         }
+    })
 
 
 class ComparisonDetail(BaseModel):
@@ -329,13 +317,15 @@ class ComparisonDetail(BaseModel):
     similarity: Optional[float] = Field(None, description="Similitud 0-1 si aplica")
     icon: str = Field(..., description="✅ | ❌ | ⚠️")
 
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
 
 class RuleValidationDetail(BaseModel):
     """Detalle completo de validación de una regla"""
-    rule_id: str = Field(..., description="R1, R2, R3, R4, R5")
+    rule_id: Literal['R1', 'R2', 'R3', 'R4', 'R5'] = Field(..., description="R1, R2, R3, R4, R5")
     rule_name: str = Field(..., description="Nombre de la regla")
     rule_description: str = Field(..., description="Descripción breve")
-    status: str = Field(..., description="passed | failed | warning | not_applicable")
+    status: Literal['passed', 'failed', 'warning', 'not_applicable'] = Field(..., description="Resultado de la regla")
     icon: str = Field(..., description="✅ | ❌ | ⚠️ | ➖")
     summary: str = Field(..., description="Resumen del resultado")
     details: list[str] = Field(default_factory=list, description="Detalles adicionales")
@@ -343,21 +333,20 @@ class RuleValidationDetail(BaseModel):
     errors: list[ValidationError] = Field(default_factory=list, description="Errores específicos")
     recommendation: Optional[str] = Field(None, description="Recomendación de acción")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "rule_id": "R5",
-                "rule_name": "Coincidencia de Operador",
-                "rule_description": "Verifica que el operador del formulario coincida con el del manifiesto",
-                "status": "passed",
-                "icon": "✅",
-                "summary": "El operador coincide con el manifiesto",
-                "details": ["Formulario: Andy Anderson", "Manifest: Andy Anderson", "Similitud: 100%"],
-                "comparisons": [],
-                "errors": [],
-                "recommendation": None
-            }
+    model_config = ConfigDict(extra='forbid', frozen=True, json_schema_extra={
+        "example": {
+            "rule_id": "R5",
+            "rule_name": "Coincidencia de Operador",
+            "rule_description": "Verifica que el operador del formulario coincida con el del manifiesto",
+            "status": "passed",
+            "icon": "✅",
+            "summary": "El operador coincide con el manifiesto",
+            "details": ["Formulario: Andy Anderson", "Manifest: Andy Anderson", "Similitud: 100%"],
+            "comparisons": [],
+            "errors": [],
+            "recommendation": None
         }
+    })
 
 
 class ValidationSummary(BaseModel):
@@ -366,22 +355,21 @@ class ValidationSummary(BaseModel):
     passed_rules: int = Field(..., description="Reglas que pasaron")
     failed_rules: int = Field(..., description="Reglas que fallaron")
     warning_rules: int = Field(..., description="Reglas con advertencias")
-    overall_status: str = Field(..., description="success | partial | failed")
+    overall_status: Literal['success', 'partial', 'failed'] = Field(..., description="Resultado global")
     confidence_average: float = Field(..., description="Confianza promedio de extracción 0-1")
     processing_time: float = Field(..., description="Tiempo de procesamiento en segundos")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "total_rules": 5,
-                "passed_rules": 2,
-                "failed_rules": 3,
-                "warning_rules": 0,
-                "overall_status": "partial",
-                "confidence_average": 0.72,
-                "processing_time": 3.2
-            }
+    model_config = ConfigDict(extra='forbid', frozen=True, json_schema_extra={
+        "example": {
+            "total_rules": 5,
+            "passed_rules": 2,
+            "failed_rules": 3,
+            "warning_rules": 0,
+            "overall_status": "partial",
+            "confidence_average": 0.72,
+            "processing_time": 3.2
         }
+    })
 
 
 class EnhancedValidationResponse(BaseModel):
@@ -396,23 +384,22 @@ class EnhancedValidationResponse(BaseModel):
     extraction: list[DocumentExtractionReport] = Field(..., description="Reporte de extracción por documento")
     timestamp: str = Field(..., description="Timestamp ISO 8601")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "success": False,
-                "message": "Se encontraron 3 errores de validación",
-                "errors": [],
-                "summary": {
-                    "total_rules": 5,
-                    "passed_rules": 2,
-                    "failed_rules": 3,
-                    "warning_rules": 0,
-                    "overall_status": "partial",
-                    "confidence_average": 0.72,
-                    "processing_time": 3.2
-                },
-                "rules": [],
-                "extraction": [],
-                "timestamp": "2025-10-26T14:32:15.123Z"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "success": False,
+            "message": "Se encontraron 3 errores de validación",
+            "errors": [],
+            "summary": {
+                "total_rules": 5,
+                "passed_rules": 2,
+                "failed_rules": 3,
+                "warning_rules": 0,
+                "overall_status": "partial",
+                "confidence_average": 0.72,
+                "processing_time": 3.2
+            },
+            "rules": [],
+            "extraction": [],
+            "timestamp": "2025-10-26T14:32:15.123Z"
         }
+    })
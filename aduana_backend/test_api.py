@@ -5,13 +5,17 @@ Creates a minimal test payload to verify the endpoint functionality
 
 import requests
 import json
+import orjson
 import base64
+from functools import lru_cache
 from io import BytesIO
 from PIL import Image
 
+@lru_cache(maxsize=None)
 def create_test_image(text: str, size=(400, 300)) -> str:
     """
     Create a simple test image with text and return as base64 data URL
+    Memoized: repeated runs reuse the encoded payload instead of re-encoding it
     """
     # Create a simple image
     img = Image.new('RGB', size, color=(255, 255, 255))
@@ -49,12 +53,14 @@ def test_validate_endpoint():
     print("Sending request...\n")
 
     try:
-        # Send POST request
-        response = requests.post(
-            "http://localhost:8000/api/validate",
-            json=payload,
-            headers={"Content-Type": "application/json"}
-        )
+        # Send POST request (Session keeps the connection alive for repeated
+        # calls; orjson encodes the multi-MB payload faster than json=)
+        with requests.Session() as session:
+            response = session.post(
+                "http://localhost:8000/api/validate",
+                data=orjson.dumps(payload),
+                headers={"Content-Type": "application/json"}
+            )
 
         # Print response
         print(f"Status Code: {response.status_code}")
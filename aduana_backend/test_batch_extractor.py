@@ -0,0 +1,102 @@
+"""
+Test script for the Batch API extraction module
+Round-trips trips through the JSONL request builder and the output demux
+without making OpenAI API calls
+"""
+
+import orjson
+
+from core.batch_extractor import build_batch_requests, parse_batch_output
+
+
+# Model answer for each document of trip N (plates and entry carry the trip index)
+def fake_answers(trip_index: int) -> dict:
+    return {
+        "doda": {"fecha_emision": "2025-01-15", "seccion_aduanera": "Tijuana"},
+        "manifest": {
+            "placa_tracto": f"ABC-{trip_index}",
+            "placa_remolque": f"XYZ-{trip_index}",
+            "nombre_operador": "Juan Pérez García",
+            "aduana_arribo": "Tijuana",
+            "numero_entry": f"ENT-2025-{trip_index:06d}",
+            "broker": "Brokers Unidos S.A.",
+            "descripcion_mercancia": "Productos electrónicos",
+            "cantidad": 100.0,
+            "peso_monto": 5000.5
+        },
+        "prefile": {
+            "numero_entry": f"ENT-2025-{trip_index:06d}",
+            "broker": "Brokers Unidos S.A.",
+            "descripcion_mercancia": "Productos electrónicos",
+            "cantidad": 100.0,
+            "peso_monto": 5000.5
+        },
+        "tractor_plate": {"plate_number": f"ABC-{trip_index}", "confidence": 0.95},
+        "trailer_plate": {"plate_number": f"XYZ-{trip_index}", "confidence": 0.93}
+    }
+
+
+def fake_batch_output(requests_jsonl: bytes) -> bytes:
+    """
+    Answer every request line the way the Batch API does, in reverse order
+    (the output file does not keep the input order)
+    """
+    lines = []
+    for line in reversed(requests_jsonl.splitlines()):
+        request = orjson.loads(line)
+        trip, field = request["custom_id"].removeprefix("trip_").split("_", 1)
+        content = "```json\n" + orjson.dumps(fake_answers(int(trip))[field]).decode() + "\n```"
+        lines.append(orjson.dumps({
+            "id": f"batch_req_{request['custom_id']}",
+            "custom_id": request["custom_id"],
+            "response": {
+                "status_code": 200,
+                "body": {"choices": [{"message": {"role": "assistant", "content": content}}]}
+            },
+            "error": None
+        }))
+    return b"\n".join(lines) + b"\n"
+
+
+def test_batch_round_trip():
+    trips = [
+        {key: f"{key}-{trip_index}".encode() for key in ("doda", "manifest", "prefile", "tractor", "trailer")}
+        for trip_index in range(3)
+    ]
+
+    requests_jsonl = build_batch_requests(trips)
+    requests = [orjson.loads(line) for line in requests_jsonl.splitlines()]
+    assert len(requests) == 3 * 5
+    assert len({request["custom_id"] for request in requests}) == len(requests)
+    assert all(request["method"] == "POST" and request["url"] == "/v1/chat/completions" for request in requests)
+
+    extracted = parse_batch_output(fake_batch_output(requests_jsonl), len(trips))
+
+    assert len(extracted) == len(trips)
+    for trip_index, data in enumerate(extracted):
+        answers = fake_answers(trip_index)
+        assert data.manifest.numero_entry == answers["manifest"]["numero_entry"]
+        assert data.prefile.numero_entry == answers["prefile"]["numero_entry"]
+        assert data.tractor_plate.plate_number == answers["tractor_plate"]["plate_number"]
+        assert data.trailer_plate.plate_number == answers["trailer_plate"]["plate_number"]
+        assert data.doda.seccion_aduanera == "Tijuana"
+
+
+def test_batch_failed_request():
+    trips = [{key: b"img" for key in ("doda", "manifest", "prefile", "tractor", "trailer")}]
+    output = fake_batch_output(build_batch_requests(trips))
+
+    failed = [orjson.loads(line) for line in output.splitlines()]
+    failed[0]["response"]["status_code"] = 500
+    try:
+        parse_batch_output(b"\n".join(orjson.dumps(item) for item in failed), len(trips))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("A failed batch request must raise ValueError")
+
+
+if __name__ == "__main__":
+    test_batch_round_trip()
+    test_batch_failed_request()
+    print("[PASS] Batch JSONL build/demux round-trip")
@@ -4,44 +4,50 @@ Creates test images with text to verify OCR functionality
 """
 
 import base64
+from functools import lru_cache
 from io import BytesIO
 from PIL import Image, ImageDraw, ImageFont
 import json
 
-def create_test_document_with_text(text_lines: list, size=(800, 600)) -> str:
+
+# Loaded once: the truetype lookup searches the font paths (and usually
+# falls back to the default font) every time it runs
+try:
+    _FONT = ImageFont.truetype("arial.ttf", 24)
+except OSError:
+    _FONT = ImageFont.load_default()
+
+
+@lru_cache(maxsize=64)
+def create_test_document_with_text(text_lines: tuple, size=(800, 600)) -> str:
     """
     Create a test document image with text lines
+    Memoized: the data URL is a pure function of the lines and size
 
     Args:
-        text_lines: List of text lines to draw on the image
+        text_lines: Tuple of text lines to draw on the image
         size: Image size (width, height)
 
     Returns:
         Base64 data URL of the image
     """
-    # Create white image
-    img = Image.new('RGB', size, color=(255, 255, 255))
+    # Create white grayscale image (black text only needs one channel)
+    img = Image.new('L', size, color=255)
     draw = ImageDraw.Draw(img)
 
-    # Try to use a default font, fallback to default if not available
-    try:
-        font = ImageFont.truetype("arial.ttf", 24)
-    except:
-        font = ImageFont.load_default()
-
     # Draw text lines
     y_position = 50
     for line in text_lines:
-        draw.text((50, y_position), line, fill=(0, 0, 0), font=font)
+        draw.text((50, y_position), line, fill=0, font=_FONT)
         y_position += 40
 
-    # Convert to base64
+    # Convert to base64 (lossless PNG: no JPEG ringing around the text edges)
     buffer = BytesIO()
-    img.save(buffer, format='JPEG', quality=90)
-    img_bytes = buffer.getvalue()
-    img_base64 = base64.b64encode(img_bytes).decode('utf-8')
+    img.save(buffer, format='PNG', compress_level=1)
+    # getbuffer() is a view of the BytesIO storage (getvalue() would copy it)
+    img_base64 = base64.b64encode(buffer.getbuffer()).decode('ascii')
 
-    return f"data:image/jpeg;base64,{img_base64}"
+    return f"data:image/png;base64,{img_base64}"
 
 
 def create_test_payload():
@@ -49,17 +55,17 @@ def create_test_payload():
     Create a test payload with realistic document text
     """
     # DODA document
-    doda_text = [
+    doda_text = (
         "DECLARACIÓN DE OPERACIÓN DE DESPACHO ADUANERO",
         "DODA",
         "",
         "Fecha de Emisión: 2025-10-20",
         "Sección Aduanera: Tijuana",
         "Número de Documento: DODA-2025-001234",
-    ]
+    )
 
     # E-Manifest document
-    manifest_text = [
+    manifest_text = (
         "E-MANIFEST / MANIFIESTO ELECTRÓNICO",
         "",
         "Placa Tracto: ABC-123",
@@ -72,10 +78,10 @@ def create_test_payload():
         "Mercancía: Productos electrónicos",
         "Cantidad: 100 unidades",
         "Peso/Monto: 5000.50 kg",
-    ]
+    )
 
     # Prefile document
-    prefile_text = [
+    prefile_text = (
         "PREFILE / PRE-DECLARACIÓN",
         "",
         "Entry Number: ENT-2025-001234",
@@ -84,25 +90,25 @@ def create_test_payload():
         "Descripción: Productos electrónicos",
         "Cantidad: 100",
         "Peso/Monto: 5000.50",
-    ]
+    )
 
     # Tractor plate
-    tractor_plate_text = [
+    tractor_plate_text = (
         "",
         "",
         "    ABC-123",
         "",
         "   MÉXICO",
-    ]
+    )
 
     # Trailer plate
-    trailer_plate_text = [
+    trailer_plate_text = (
         "",
         "",
         "    XYZ-789",
         "",
         "   MÉXICO",
-    ]
+    )
 
     payload = {
         "driverData": {
@@ -121,8 +127,17 @@ def create_test_payload():
 
 
 if __name__ == "__main__":
+    import argparse
+    import os
+    import orjson
     import requests
 
+    parser = argparse.ArgumentParser(description="Send a synthetic payload to /api/validate")
+    parser.add_argument("-y", "--yes", action="store_true",
+                        help="Skip the 3-second cancel window (also AUTO_CONFIRM=1)")
+    args = parser.parse_args()
+    auto_confirm = args.yes or os.getenv("AUTO_CONFIRM", "").lower() in ("1", "true")
+
     print("=" * 70)
     print("OpenAI Data Extraction Test")
     print("=" * 70)
@@ -139,18 +154,22 @@ if __name__ == "__main__":
     print("Sending request to /api/validate...")
     print("=" * 70)
     print("\nNOTE: This will make actual OpenAI API calls and may take 30-60 seconds.")
-    print("      Press Ctrl+C to cancel if you don't want to proceed.\n")
+    if not auto_confirm:
+        print("      Press Ctrl+C to cancel if you don't want to proceed.\n")
 
     try:
-        import time
-        time.sleep(3)  # Give user time to cancel
-
-        response = requests.post(
-            "http://localhost:8000/api/validate",
-            json=payload,
-            headers={"Content-Type": "application/json"},
-            timeout=120  # 2 minute timeout for AI processing
-        )
+        if not auto_confirm:
+            import time
+            time.sleep(3)  # Give user time to cancel
+
+        # Session keeps the connection alive if this is rerun in a loop
+        with requests.Session() as session:
+            response = session.post(
+                "http://localhost:8000/api/validate",
+                data=orjson.dumps(payload),  # faster than requests' stdlib json= encoding
+                headers={"Content-Type": "application/json"},
+                timeout=120  # 2 minute timeout for AI processing
+            )
 
         print(f"\nStatus Code: {response.status_code}")
         print("\nResponse:")